@@ -10,7 +10,7 @@ from .subagents import (
     system_design_agent,
     general_agent
 )
-from shared_tools.db_tools import log_conversation, get_user_history
+from shared_tools.db_tools import log_conversation, get_user_history, search_history
 from shared_tools.path_tools import create_learning_path_tool, get_learning_paths_tool
 from .utils.llm_config import retry_config
 
@@ -23,16 +23,15 @@ root_agent = Agent(
 
 **Context & History:**
 - Always check `get_user_history` to understand previous context.
+- If the user asks where/when something was covered before (possibly in another session), use `search_history` with the key terms and cite the matching session and date.
+
+**Session Context (set by the app, already verified):**
+{tutor_context?}
 
 **Authentication Check:**
-- IF you receive a message starting with `[System]`: 
-    - This confirms the user is already logged in. 
-    - IF the message asks you to "Greet them enthusiastically and PROVIDE A DETAILED EXPLANATION", follow those instructions immediately. Output the greeting.
-    - ELSE, acknowledge briefly (e.g., "Welcome back, [Name]!") and ASK how you can help.
-    - DO NOT use `account_agent`.
-- CHECK if `authenticated` is True in session state.
-- IF `authenticated` is True: DO NOT ask to login.
-- IF `authenticated` is False/Missing AND no `[System]` message: Use `account_agent` to handle login.
+- IF the Session Context above names the user, or `authenticated` is True in session state: they are logged in. DO NOT ask them to log in and DO NOT use `account_agent`.
+- OTHERWISE: Use `account_agent` to handle login.
+- Use the Session Context (learning path, level, current topic) instead of asking the student where they are.
 
 **Routing:**
 - DSA problems (algorithms, code, sorting, etc.) → dsa_agent
@@ -67,6 +66,7 @@ root_agent = Agent(
         AgentTool(agent=general_agent),
         FunctionTool(log_conversation),
         FunctionTool(get_user_history),
+        FunctionTool(search_history),
         FunctionTool(create_learning_path_tool),
         FunctionTool(get_learning_paths_tool)
     ]
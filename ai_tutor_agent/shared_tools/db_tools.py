@@ -1,12 +1,15 @@
 """Database interaction tools."""
 from google.adk.tools.tool_context import ToolContext
+import asyncio
 import uuid
 import os
-from ai_tutor_agent.utils.db_manager import db_manager
+from ai_tutor_agent.utils.async_db_manager import async_db_manager
+from ai_tutor_agent.utils.guest_reaper import GuestReaper
+from ai_tutor_agent.utils import ui_changes
 
-def check_user(user_id: str, tool_context: ToolContext) -> dict:
+async def check_user(user_id: str, tool_context: ToolContext) -> dict:
     """Check if user exists and load their profile to context."""
-    user = db_manager.get_user(user_id)
+    user = await async_db_manager.get_user(user_id)
     
     if user:
         tool_context.state[f"user:{user_id}_name"] = user["name"]
@@ -25,14 +28,14 @@ def check_user(user_id: str, tool_context: ToolContext) -> dict:
         "message": "User not found in database"
     }
 
-def create_user(user_id: str, name: str, tool_context: ToolContext) -> dict:
+async def create_user(user_id: str, name: str, tool_context: ToolContext) -> dict:
     """Create a new user account in the database."""
     
 
     if user_id.lower() == "guest" or user_id.startswith("guest_"):
         user_id = f"guest_{uuid.uuid4().hex[:6]}"
     
-    result = db_manager.create_user(user_id, name)
+    result = await async_db_manager.create_user(user_id, name)
     
     if result["success"]:
         tool_context.state["current_user_id"] = user_id
@@ -55,14 +58,14 @@ def create_user(user_id: str, name: str, tool_context: ToolContext) -> dict:
         "message": f"Failed to create account: {result.get('error', 'Unknown error')}"
     }
 
-def log_conversation(agent_name: str, query: str, response: str, tool_context: ToolContext) -> dict:
+async def log_conversation(agent_name: str, query: str, response: str, tool_context: ToolContext) -> dict:
     """Log the conversation to database for persistence."""
     user_id = tool_context.state.get("current_user_id", "anonymous")
     session_id = getattr(tool_context, 'session_id', None)
     if not session_id:
         session_id = tool_context.state.get("session_id", "default_session")
     
-    success = db_manager.log_interaction(
+    success = await async_db_manager.log_interaction(
         session_id=session_id,
         user_id=user_id,
         agent_name=agent_name,
@@ -78,24 +81,17 @@ def log_conversation(agent_name: str, query: str, response: str, tool_context: T
 
 
 
-def delete_guest_user(user_id: str, tool_context: ToolContext) -> dict:
-    """Delete a guest user from the database."""
+async def delete_guest_user(user_id: str, tool_context: ToolContext) -> dict:
+    """Delete a guest user and all of their data from the database."""
     if not user_id.startswith("guest_"):
         return {"success": False, "message": "Can only delete guest users"}
     
-    from utils.db_manager import db_manager, User
-    session = db_manager.get_session()
-    try:
-        session.query(User).filter_by(user_id=user_id).delete()
-        session.commit()
+    counts = await asyncio.to_thread(GuestReaper().delete_guests, [user_id])
+    if counts.get("users"):
         return {"success": True, "message": f"Guest user {user_id} deleted"}
-    except:
-        session.rollback()
-        return {"success": False}
-    finally:
-        session.close()
+    return {"success": False}
 
-def get_user_history(tool_context: ToolContext) -> dict:
+async def get_user_history(tool_context: ToolContext) -> dict:
     """Get recent chat history for the current user."""
     user_id = tool_context.state.get("current_user_id")
     if not user_id:
@@ -105,33 +101,51 @@ def get_user_history(tool_context: ToolContext) -> dict:
     if not session_id:
         session_id = tool_context.state.get("session_id")
         
-    history = db_manager.get_chat_history(user_id, session_id=session_id)
+    history = await async_db_manager.get_chat_history(user_id, session_id=session_id)
     return {"history": history}
 
-def get_student_profile(subject: str, tool_context: ToolContext) -> dict:
+async def search_history(query: str, limit: int = 5, tool_context: ToolContext = None) -> dict:
+    """
+    Search ALL of the current user's past conversations (every session) by keywords.
+    Use this when the user asks where or when something was covered, e.g. "where did we do heaps?".
+
+    Args:
+        query: Keywords to look for, e.g. "heap priority queue".
+        limit: Maximum number of matches to return (default 5).
+    """
+    user_id = tool_context.state.get("current_user_id")
+    if not user_id:
+        return {"error": "No user logged in"}
+
+    matches = await async_db_manager.search_history(user_id, query, limit=min(max(limit, 1), 20))
+    return {"matches": matches, "count": len(matches)}
+
+async def get_student_profile(subject: str, tool_context: ToolContext) -> dict:
     """Get the student's profile/level for a specific subject."""
     user_id = tool_context.state.get("current_user_id")
     if not user_id:
         return {"error": "No user logged in"}
     
-    profile = db_manager.get_student_profile(user_id, subject)
+    profile = await async_db_manager.get_student_profile(user_id, subject)
     if profile:
         return {"found": True, "profile": profile}
     return {"found": False, "message": f"No profile found for {subject}"}
 
-def update_student_profile(subject: str, level: str, details: str, tool_context: ToolContext) -> dict:
+async def update_student_profile(subject: str, level: str, details: str, tool_context: ToolContext) -> dict:
     """Update the student's profile/level for a specific subject."""
     user_id = tool_context.state.get("current_user_id")
     if not user_id:
         return {"error": "No user logged in"}
     
-    success = db_manager.update_student_profile(user_id, subject, level, details)
+    success = await async_db_manager.update_student_profile(user_id, subject, level, details)
+    if success:
+        ui_changes.mark_changed(tool_context, ui_changes.PROGRESS)
     return {
         "success": success,
         "message": f"Updated {subject} level to {level}" if success else "Failed to update"
     }
 
-def update_learning_path_details(syllabus: str, level: str = None, tool_context: ToolContext = None) -> dict:
+async def update_learning_path_details(syllabus: str, level: str = None, tool_context: ToolContext = None) -> dict:
     """
     Update the syllabus/details for the CURRENT learning path (session).
     Use this to save the specific plan for this chat session.
@@ -149,23 +163,27 @@ def update_learning_path_details(syllabus: str, level: str = None, tool_context:
     if not session_id:
          return {"success": False, "message": "No active session found"}
 
+    user_id = tool_context.state.get("current_user_id")
+
     # 1. Update Syllabus
-    success_syllabus = db_manager.update_learning_path_details(session_id, syllabus)
+    success_syllabus = await async_db_manager.update_learning_path_details(session_id, syllabus, user_id=user_id)
     
     msg = "Syllabus saved." if success_syllabus else "Failed to save syllabus."
 
+    if success_syllabus:
+        ui_changes.mark_changed(tool_context, ui_changes.PROGRESS)
+
     # 2. Update Level (if provided)
     if level:
-        user_id = tool_context.state.get("current_user_id")
         if user_id:
             # We need the subject. Find path by session_id.
-            paths = db_manager.get_learning_paths(user_id)
-            current_path = next((p for p in paths if p['session_id'] == session_id), None)
+            current_path = await async_db_manager.get_learning_path_by_session(session_id, user_id=user_id)
             
             if current_path:
                 subject = current_path['subject']
-                success_level = db_manager.update_student_profile(user_id, subject, level)
+                success_level = await async_db_manager.update_student_profile(user_id, subject, level)
                 if success_level:
+                    ui_changes.mark_changed(tool_context, ui_changes.PROGRESS)
                     msg += f" Level updated to {level}."
                 else:
                     msg += " Failed to update level."
@@ -175,4 +193,52 @@ def update_learning_path_details(syllabus: str, level: str = None, tool_context:
     return {
         "success": success_syllabus,
         "message": msg
-    }
\ No newline at end of file
+    }
+
+async def update_syllabus_progress(module: str = None, status: str = None, next_module: str = None,
+                                   current_topic: str = None, tool_context: ToolContext = None) -> dict:
+    """
+    Record progress on the CURRENT learning path without resending the syllabus.
+    Use this instead of `update_learning_path_details` whenever only statuses or the current topic change.
+    
+    Args:
+        module: Name of the module whose status changed (e.g., "Arrays").
+        status: New status for `module`: "completed", "in_progress", or "pending".
+        next_module: Optional. Module the student moves on to; it is marked "in_progress"
+                     and becomes the current topic unless `current_topic` is given.
+        current_topic: Optional. New current topic.
+    
+    Example: update_syllabus_progress(module="Arrays", status="completed", next_module="Linked Lists")
+    """
+    session_id = getattr(tool_context, 'session_id', None)
+    if not session_id:
+        session_id = tool_context.state.get("session_id")
+        
+    if not session_id:
+         return {"success": False, "message": "No active session found"}
+
+    module_status = {}
+    if module and status:
+        module_status[module] = status
+    if next_module:
+        module_status[next_module] = "in_progress"
+        current_topic = current_topic or next_module
+
+    if not module_status and current_topic is None:
+        return {"success": False, "message": "Nothing to update. Pass module/status, next_module or current_topic."}
+
+    result = await async_db_manager.apply_syllabus_patch(
+        session_id, module_status, current_topic, user_id=tool_context.state.get("current_user_id")
+    )
+    if not result["success"]:
+        return {"success": False, "message": result.get("error", "Failed to update progress.")}
+    ui_changes.mark_changed(tool_context, ui_changes.PROGRESS)
+
+    msg = "Progress saved."
+    if result["unknown_modules"]:
+        msg += f" Unknown modules (check exact names in the syllabus): {', '.join(result['unknown_modules'])}."
+    return {
+        "success": True,
+        "syllabus_hash": result["syllabus_hash"],
+        "message": msg
+    }
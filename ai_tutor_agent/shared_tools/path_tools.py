@@ -2,9 +2,11 @@ from google.adk.tools.tool_context import ToolContext
 import sys
 import os
 
-from ai_tutor_agent.utils.db_manager import db_manager
+from ai_tutor_agent.utils.async_db_manager import async_db_manager
+from ai_tutor_agent.utils.syllabus import syllabus_context
+from ai_tutor_agent.utils import ui_changes
 
-def create_learning_path_tool(subject: str, title: str = None, tool_context: ToolContext = None) -> dict:
+async def create_learning_path_tool(subject: str, title: str = None, tool_context: ToolContext = None) -> dict:
     """
     Creates a new Learning Path (persistent chat) for a specific subject.
     Use this when the user starts learning a new topic or wants to continue a specific subject.
@@ -30,13 +32,14 @@ def create_learning_path_tool(subject: str, title: str = None, tool_context: Too
     if not title:
         title = subject.replace("_", " ").title()
 
-    success = db_manager.create_learning_path(user_id, session_id, subject, title)
+    success = await async_db_manager.create_learning_path(user_id, session_id, subject, title)
     
     if not success:
         return {"error": "Failed to create learning path record."}
+    ui_changes.mark_changed(tool_context, ui_changes.PATHS, ui_changes.PROGRESS)
         
     # Implement "Inheritance" logic - user gets credit for past progress
-    profile = db_manager.get_student_profile(user_id, subject)
+    profile = await async_db_manager.get_student_profile(user_id, subject)
     
     response = {
         "success": True,
@@ -57,7 +60,7 @@ def create_learning_path_tool(subject: str, title: str = None, tool_context: Too
             "syllabus": []  # Empty syllabus triggers "New User" logic in agents
         }
         import json
-        db_manager.update_student_profile(user_id, subject, "Unknown", json.dumps(initial_details))
+        await async_db_manager.update_student_profile(user_id, subject, "Unknown", json.dumps(initial_details))
         
         response["message"] += " Starting fresh. Please assess the student's level."
         response["existing_profile"] = {
@@ -68,7 +71,7 @@ def create_learning_path_tool(subject: str, title: str = None, tool_context: Too
         
     return response
 
-def get_learning_paths_tool(tool_context: ToolContext = None) -> dict:
+async def get_learning_paths_tool(tool_context: ToolContext = None) -> dict:
     """Get all learning paths for the current user."""
     if not tool_context:
         return {"error": "Tool context missing"}
@@ -77,7 +80,8 @@ def get_learning_paths_tool(tool_context: ToolContext = None) -> dict:
     if not user_id:
         return {"error": "User ID missing"}
         
-    paths = db_manager.get_learning_paths(user_id)
+    # Other paths' syllabi are never shown, so don't load them
+    paths = await async_db_manager.get_learning_paths(user_id, include_syllabus=False)
     
     # Identify current session context
     current_session_id = getattr(tool_context, 'session_id', None)
@@ -88,18 +92,16 @@ def get_learning_paths_tool(tool_context: ToolContext = None) -> dict:
         if p['session_id'] == current_session_id:
             p['is_current'] = True
             p['title'] = f"{p['title']} (CURRENT)"
-            # Ensure syllabus is present and parsed if string
-            if isinstance(p.get('syllabus'), str) and p.get("syllabus") == "{}":
-                 p['syllabus'] = None # Explicitly show empty if empty
+            current_path = await async_db_manager.get_learning_path_by_session(current_session_id, user_id=user_id)
+            # Explicitly show empty if empty
+            p['syllabus'] = syllabus_context(current_path.get('syllabus')) if current_path else None
         else:
+            # CRITICAL: Other paths carry no syllabus, preventing hallucination
             p['is_current'] = False
-            # CRITICAL: Redact syllabus of other paths to prevent hallucination
-            if 'syllabus' in p:
-                del p['syllabus'] 
             
     return {"paths": paths}
 
-def get_current_learning_path_context(tool_context: ToolContext) -> dict:
+async def get_current_learning_path_context(tool_context: ToolContext) -> dict:
     """
     Get DETAILED context for the CURRENT learning path (session).
     This includes the persistent Syllabus, Subject, and Title.
@@ -112,15 +114,17 @@ def get_current_learning_path_context(tool_context: ToolContext) -> dict:
     if not session_id:
         return {"error": "No active session ID found."}
         
-    paths = db_manager.get_learning_paths(tool_context.state.get("current_user_id"))
-    current_path = next((p for p in paths if p['session_id'] == session_id), None)
+    user_id = tool_context.state.get("current_user_id")
+    current_path = await async_db_manager.get_learning_path_by_session(session_id, user_id=user_id)
     
-    if current_path:
+    if current_path and current_path['user_id'] == user_id:
+        # Parsed server-side so the model gets structure, not a JSON string
+        syllabus = syllabus_context(current_path.get('syllabus'))
         return {
             "found": True,
             "title": current_path['title'],
             "subject": current_path['subject'],
-            "syllabus_json": current_path.get('syllabus', '{}'),
+            "syllabus": syllabus,
             "message": "Found active learning path."
         }
     
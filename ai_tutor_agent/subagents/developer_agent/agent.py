@@ -8,7 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from ai_tutor_agent.subagents.search_agent.agent import search_agent
 from .tools import parse_documentation
 from ai_tutor_agent.utils.llm_config import retry_config
-from shared_tools.db_tools import get_student_profile, update_student_profile, update_learning_path_details
+from shared_tools.db_tools import get_student_profile, update_student_profile, update_learning_path_details, update_syllabus_progress
 from shared_tools.path_tools import get_current_learning_path_context
 
 developer_agent = Agent(
@@ -54,7 +54,8 @@ developer_agent = Agent(
 
 4.  **Teach:** Explain concepts (React, Node, etc.) clearly with code examples.
 5.  **Tracking Progress:**
-    - When a module is done, you MUST call `update_learning_path_details` again with updated status.
+    - When a module is done, you MUST call `update_syllabus_progress(module="<finished module>", status="completed", next_module="<next module>")`.
+    - Only call `update_learning_path_details` again if the plan itself changes.
 
 **Expertise:**
 - **Web:** React, Vue, Node.js, Django, APIs
@@ -68,6 +69,7 @@ Provide practical, working code examples and explain best practices.""",
         FunctionTool(get_student_profile),
         FunctionTool(update_student_profile),
         FunctionTool(update_learning_path_details),
+        FunctionTool(update_syllabus_progress),
         FunctionTool(get_current_learning_path_context)
     ]
 )
@@ -7,7 +7,7 @@ import os
 
 # Add project root to path for shared tools
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from shared_tools.db_tools import get_student_profile, update_student_profile, update_learning_path_details
+from shared_tools.db_tools import get_student_profile, update_student_profile, update_learning_path_details, update_syllabus_progress
 from shared_tools.path_tools import get_current_learning_path_context
 from ai_tutor_agent.utils.llm_config import retry_config
 
@@ -26,7 +26,7 @@ If you receive a request from the Root Agent (e.g., "Explain the next topic"), t
 **Workflow:**
 1.  **Check Context (CRITICAL):**
     - Call `get_current_learning_path_context()` to see if a syllabus already exists for this chat.
-    - If `found` is True and `syllabus_json` exists, USE IT.
+    - If `found` is True and `syllabus` exists (modules, statuses, current topic, progress), USE IT.
     - ONLY if not found, check `get_student_profile` for legacy/global level info.
 2.  **Assessment & Syllabus Creation (CRITICAL):**
     - **Step 1: Check Context.**
@@ -69,20 +69,21 @@ If you receive a request from the Root Agent (e.g., "Explain the next topic"), t
     *   DO NOT jump straight to code unless asked.
     *   DO NOT hallucinate algorithms (e.g., don't explain Bubble Sort if asked about Arrays generally).
 5.  **Update Progress:**
-    *   **CRITICAL:** When the user completes a module or moves to the next one:
-        1. Update the finished module's `status` to "completed".
-        2. Update the new module's `status` to "in_progress".
-        3. Call `update_learning_path_details`.
+    *   **CRITICAL:** When the user completes a module or moves to the next one, call
+        `update_syllabus_progress(module="<finished module>", status="completed", next_module="<next module>")`.
+    *   Do NOT resend the whole syllabus just to change a status.
 
 **Tools:**
 - `get_student_profile`: To check level.
 - `update_student_profile`: To record level changes.
-- `update_learning_path_details`: **PRIMARY** tool for saving syllabus.
+- `update_learning_path_details`: **PRIMARY** tool for saving a new or restructured syllabus.
+- `update_syllabus_progress`: For status / current topic changes only.
 """,
     tools=[
         FunctionTool(get_student_profile),
         FunctionTool(update_student_profile),
         FunctionTool(update_learning_path_details),
+        FunctionTool(update_syllabus_progress),
         FunctionTool(get_current_learning_path_context)
     ]
 )
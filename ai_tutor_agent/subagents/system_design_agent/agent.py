@@ -8,7 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from ai_tutor_agent.subagents.search_agent.agent import search_agent
 from ai_tutor_agent.utils.llm_config import retry_config
 from ai_tutor_agent.utils.llm_config import retry_config
-from shared_tools.db_tools import get_student_profile, update_student_profile, update_learning_path_details
+from shared_tools.db_tools import get_student_profile, update_student_profile, update_learning_path_details, update_syllabus_progress
 
 system_design_agent = Agent(
     name="system_design_agent",
@@ -51,10 +51,9 @@ system_design_agent = Agent(
     - **THEN:** Ask the user to confirm the plan before starting. **Do NOT start teaching immediately.**
 4.  **Teach:** Use ASCII diagrams, explain trade-offs (CAP theorem, SQL vs NoSQL).
 5.  **Update Progress:**
-    *   **CRITICAL:** When the user completes a module or moves to the next one:
-        1. Update the finished module's `status` to "completed".
-        2. Update the new module's `status` to "in_progress".
-        3. Call `update_student_profile` with the **ENTIRE** updated JSON object in `details`.
+    *   **CRITICAL:** When the user completes a module or moves to the next one, call
+        `update_syllabus_progress(module="<finished module>", status="completed", next_module="<next module>")`.
+    *   Do NOT resend the whole syllabus just to change a status.
 
 **Expertise:**
 - **Databases:** SQL, NoSQL, Sharding, Replication
@@ -67,6 +66,7 @@ Start with high-level design, then drill into components.""",
         AgentTool(agent=search_agent),
         FunctionTool(get_student_profile),
         FunctionTool(update_student_profile),
-        FunctionTool(update_learning_path_details)
+        FunctionTool(update_learning_path_details),
+        FunctionTool(update_syllabus_progress)
     ]
 )
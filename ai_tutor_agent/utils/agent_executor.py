@@ -0,0 +1,210 @@
+"""Process-wide executor for agent turns, for the Streamlit app."""
+from contextlib import aclosing
+from datetime import datetime
+from typing import Iterator
+import asyncio
+import os
+import queue
+import threading
+import time
+import uuid
+
+from google.adk.events.event import Event
+from google.adk.runners import Runner
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class AgentJob:
+    """Handle of one submitted turn.
+
+    Events are kept as they arrive, so any number of readers can ``poll()``
+    or ``stream()`` the turn, from the start, while it runs or after it has
+    finished (e.g. a Streamlit rerun picking up a turn in progress).
+    """
+
+    def __init__(self, user_id: str, session_id: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.session_id = session_id
+        self.status = QUEUED
+        self.error: str | None = None
+        self.events: list[Event] = []
+        self.submitted_at = datetime.utcnow()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self._cond = threading.Condition()
+        self._future = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def poll(self, since: int = 0) -> list:
+        """Events from index ``since`` on, without waiting."""
+        with self._cond:
+            return self.events[since:]
+
+    def stream(self, timeout: float | None = None) -> Iterator[Event]:
+        """Yield every event of the turn, waiting for new ones until it ends.
+
+        Stops early if no event arrives for ``timeout`` seconds.
+        """
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self.events) and not self.done:
+                    self._cond.wait(timeout)
+                new = self.events[index:]
+                finished = self.done
+            if not new and not finished:
+                return  # timed out
+            yield from new
+            index += len(new)
+            if finished and index >= len(self.events):
+                return
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the turn ends. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+    def cancel(self) -> None:
+        if self._future is not None:
+            self._future.cancel()
+
+    def _append(self, event: Event) -> None:
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def _finish(self, status: str, error: str | None = None) -> None:
+        with self._cond:
+            self.status = status
+            self.error = error
+            self.finished_at = datetime.utcnow()
+            self._cond.notify_all()
+
+
+class AgentExecutor:
+    """Runs ``runner.run_async`` turns on one event loop owned by a daemon thread.
+
+    Page threads ``submit()`` and get an AgentJob back instead of driving a
+    whole multi-agent turn themselves (``Runner.run`` starts a thread and a
+    loop per call). At most ``max_workers`` turns run at once and at most
+    ``per_user`` of them for one user, so a user's turns run in order; at
+    most ``max_pending`` may be waiting or running before submit() raises
+    ``queue.Full``.
+    """
+
+    def __init__(self, runner: Runner, max_workers: int = None, per_user: int = None,
+                 max_pending: int = None, timeout_seconds: float = None):
+        self.runner = runner
+        self.max_workers = max_workers or int(os.getenv("AGENT_WORKERS", "8"))
+        self.per_user = per_user or int(os.getenv("AGENT_PER_USER_LIMIT", "1"))
+        self.max_pending = max_pending or int(os.getenv("AGENT_MAX_PENDING", "100"))
+        self.timeout_seconds = timeout_seconds or float(os.getenv("AGENT_JOB_TIMEOUT_SECONDS", "300"))
+        self._loop = asyncio.new_event_loop()
+        self._workers: asyncio.Semaphore | None = None
+        self._user_slots: dict = {}  # user_id -> [Semaphore, jobs holding or waiting]
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run_loop, name="agent-executor", daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id: str, session_id: str, **run_kwargs) -> AgentJob:
+        """Queue a turn; ``run_kwargs`` go to runner.run_async (new_message, run_config, ...)."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise queue.Full(f"{self._pending} agent turns already pending")
+            self._pending += 1
+            self._stats["submitted"] += 1
+        job = AgentJob(user_id, session_id)
+        job._future = asyncio.run_coroutine_threadsafe(self._execute(job, run_kwargs), self._loop)
+        # Also runs for a job cancelled before it ever started
+        job._future.add_done_callback(lambda future: self._finished(job, future))
+        return job
+
+    def call(self, coro, timeout: float | None = None):
+        """Run a short coroutine (e.g. a session service call) on the loop and return its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def get_stats(self) -> dict:
+        """Submission counters, current load and queue wait."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+            stats["running"] = self._running
+        started = stats["completed"] + stats["failed"] + stats["cancelled"]
+        stats["avg_wait_ms"] = stats["total_wait_ms"] / started if started else 0.0
+        return stats
+
+    def stop(self) -> None:
+        """Cancel every turn and stop the loop."""
+        for task in asyncio.all_tasks(self._loop):
+            self._loop.call_soon_threadsafe(task.cancel)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._workers = asyncio.Semaphore(self.max_workers)
+        self._loop.run_forever()
+
+    async def _execute(self, job: AgentJob, run_kwargs: dict) -> tuple:
+        """Run one turn. Returns (status, error)."""
+        started = time.perf_counter()
+        # Only touched on the loop thread
+        slot = self._user_slots.setdefault(job.user_id, [asyncio.Semaphore(self.per_user), 0])
+        slot[1] += 1
+        try:
+            # The user's slot first, so a user's queued turns don't hold workers
+            async with slot[0], self._workers:
+                wait_ms = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    self._running += 1
+                    self._stats["total_wait_ms"] += wait_ms
+                    self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+                job.status = RUNNING
+                job.started_at = datetime.utcnow()
+                try:
+                    await asyncio.wait_for(self._consume(job, run_kwargs), self.timeout_seconds)
+                finally:
+                    with self._lock:
+                        self._running -= 1
+            return DONE, None
+        except asyncio.CancelledError:
+            return CANCELLED, None
+        except asyncio.TimeoutError:
+            return FAILED, f"Timed out after {self.timeout_seconds:.0f} s"
+        except Exception as e:
+            print(f"⚠️ Agent turn for {job.user_id} failed: {e}")
+            return FAILED, str(e)
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._user_slots[job.user_id]
+
+    async def _consume(self, job: AgentJob, run_kwargs: dict) -> None:
+        events = self.runner.run_async(user_id=job.user_id, session_id=job.session_id, **run_kwargs)
+        async with aclosing(events):
+            async for event in events:
+                job._append(event)
+
+    def _finished(self, job: AgentJob, future) -> None:
+        status, error = (CANCELLED, None) if future.cancelled() else future.result()
+        with self._lock:
+            self._pending -= 1
+            self._stats[{DONE: "completed", FAILED: "failed", CANCELLED: "cancelled"}[status]] += 1
+        job._finish(status, error)
@@ -0,0 +1,88 @@
+"""Background archival of old interactions out of the hot table."""
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+
+from ai_tutor_agent.utils.db_manager import DBManager
+
+
+class InteractionArchiver:
+    """Moves interactions older than ``hot_days`` into ``interactions_archive``.
+
+    Works in batches of ``batch_size`` rows, one transaction each, and rolls
+    every batch up into the per-session ``session_summaries`` rows. History
+    reads fall through to the archive, so nothing disappears from the UI.
+    Each run also drops compressed text blobs that nothing references.
+    """
+
+    def __init__(self, manager: DBManager = None, hot_days: float = None,
+                 batch_size: int = None, interval_seconds: float = None):
+        self.manager = manager or DBManager()
+        self.hot_window = timedelta(days=hot_days if hot_days is not None else float(os.getenv("INTERACTIONS_HOT_DAYS", "30")))
+        self.batch_size = batch_size or int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+        self.interval_seconds = interval_seconds or float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "rows_archived": 0,
+            "last_run_at": None,
+            "last_run_ms": 0.0,
+            "last_rows_archived": 0,
+            "blobs_collected": 0,
+        }
+
+    def archive_once(self) -> dict:
+        """Archive everything past the hot window, batch by batch. Returns this run's totals."""
+        started = time.perf_counter()
+        cutoff = datetime.utcnow() - self.hot_window
+        rows = 0
+
+        while not self._stop.is_set():
+            result = self.manager.archive_interactions(cutoff, self.batch_size)
+            rows += result["archived"]
+            if result["archived"] < self.batch_size:
+                break
+
+        # Guest deletes and profile rewrites leave shared text blobs behind
+        blobs = self.manager.gc_text_blobs() if not self._stop.is_set() else 0
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["rows_archived"] += rows
+            self._stats["last_run_at"] = datetime.utcnow().isoformat()
+            self._stats["last_run_ms"] = elapsed * 1000
+            self._stats["last_rows_archived"] = rows
+            self._stats["blobs_collected"] += blobs
+
+        if rows:
+            print(f"📦 Archived {rows} old interaction(s) in {elapsed * 1000:.0f} ms")
+        return {"rows_archived": rows, "blobs_collected": blobs, "elapsed_ms": elapsed * 1000}
+
+    def start(self) -> None:
+        """Run archive_once() every interval_seconds on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="interaction-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.archive_once()
+            except Exception as e:
+                print(f"⚠️ Interaction archiver run failed: {e}")
+            self._stop.wait(self.interval_seconds)
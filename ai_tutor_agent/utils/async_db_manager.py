@@ -0,0 +1,321 @@
+"""Async database manager for use inside ADK tool calls.
+
+Mirrors the ``DBManager`` method surface on top of an ``AsyncEngine`` so tools
+running under ``Runner.run_async`` await their queries instead of blocking the
+event loop shared with ADK's aiosqlite ``DatabaseSessionService``.
+"""
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.pool import NullPool
+from datetime import datetime
+import asyncio
+import copy
+import threading
+
+from ai_tutor_agent.utils.db_manager import DBManager, LazyManager, enable_sqlite_wal
+from ai_tutor_agent.utils import db_queries
+from ai_tutor_agent.utils.cache import MISSING
+
+
+def to_async_uri(db_uri: str) -> str:
+    """Map a sync SQLAlchemy URI to its async driver (sqlite -> aiosqlite)."""
+    if db_uri.startswith("sqlite:///"):
+        return db_uri.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    return db_uri
+
+
+class AsyncDBManager:
+    """Singleton async twin of DBManager."""
+
+    _instance = None
+    _lock = threading.Lock()
+    engine: AsyncEngine
+    Session: async_sessionmaker[AsyncSession]
+    engines: list[AsyncEngine]
+    Sessions: list[async_sessionmaker[AsyncSession]]
+    read_engines: list[AsyncEngine]
+    read_Sessions: list[async_sessionmaker[AsyncSession]]
+    sync_manager: DBManager
+
+    def __new__(cls):
+        # The sync manager owns schema creation, migrations and the write
+        # queue; follow it when DBManager.configure() replaces it.
+        sync_manager = DBManager()
+        instance = cls._instance
+        if instance is not None and instance.sync_manager is sync_manager:
+            return instance
+        with cls._lock:
+            if cls._instance is None or cls._instance.sync_manager is not sync_manager:
+                cls._instance = cls._create(sync_manager)
+        return cls._instance
+
+    @classmethod
+    def _create(cls, sync_manager: DBManager) -> "AsyncDBManager":
+        self = super(AsyncDBManager, cls).__new__(cls)
+        self.sync_manager = sync_manager
+        # Runner.run() starts a fresh event loop per call, so pooled async
+        # connections would end up bound to a dead loop. SQLite connects
+        # are cheap; open one per session instead. (A ":memory:" URI is
+        # therefore a new empty database per session here; tests that need
+        # in-memory storage should go through DBManager.)
+        self.engines, self.Sessions = [], []
+        self.read_engines, self.read_Sessions = [], []
+        for index, sync_engine in enumerate(sync_manager.engines):
+            engine, Session = cls._async_engine(sync_manager, sync_engine)
+            self.engines.append(engine)
+            self.Sessions.append(Session)
+            # Same read routing as the sync manager
+            read_engine = sync_manager.read_engines[index]
+            if read_engine is not sync_engine:
+                engine, Session = cls._async_engine(sync_manager, read_engine, read_only=True)
+            self.read_engines.append(engine)
+            self.read_Sessions.append(Session)
+        self.engine = self.engines[0]
+        self.Session = self.Sessions[0]
+        return self
+
+    @staticmethod
+    def _async_engine(sync_manager: DBManager, sync_engine, read_only: bool = False):
+        engine = create_async_engine(
+            to_async_uri(sync_engine.url.render_as_string(hide_password=False)),
+            echo=False, poolclass=NullPool
+        )
+        enable_sqlite_wal(engine.sync_engine, read_only=read_only)
+        return engine, async_sessionmaker(
+            bind=engine, expire_on_commit=False, info=dict(sync_manager.session_info)
+        )
+
+    def _shard_session(self, index: int, read: bool = False, consistent: bool = False) -> AsyncSession:
+        """Async DBManager._shard_session()."""
+        if read and not (consistent and self.sync_manager.read_is_replica):
+            return self.read_Sessions[index]()
+        return self.Sessions[index]()
+
+    def get_session(self, user_id: str = None) -> AsyncSession:
+        """Get a new async database session on user_id's shard (shard 0 if None)."""
+        return self._shard_session(self.sync_manager.shard_index(user_id) if user_id else 0)
+
+    def get_read_session(self, user_id: str = None, consistent: bool = False) -> AsyncSession:
+        """Get a new async read-only session on user_id's shard."""
+        return self._shard_session(self.sync_manager.shard_index(user_id) if user_id else 0,
+                                   read=True, consistent=consistent)
+
+    async def path_shard(self, session_id: str, user_id: str = None) -> int | None:
+        """Async DBManager.path_shard(); shares its session_id -> shard cache."""
+        if user_id:
+            return self.sync_manager.shard_index(user_id)
+        if len(self.engines) == 1:
+            return 0
+        session_shards = self.sync_manager.session_shards
+        cached = session_shards.get(session_id)
+        if cached is not MISSING:
+            return cached
+
+        for index in range(len(self.engines)):
+            async with self._shard_session(index, read=True, consistent=True) as session:
+                owner = await session.run_sync(db_queries.get_path_owner, session_id)
+            if owner is not None:
+                session_shards.set(session_id, index)
+                return index
+        return None
+
+    async def _path_session(self, session_id: str, user_id: str = None, read: bool = False) -> AsyncSession:
+        """Session on the shard of session_id's learning path (shard 0 if unknown)."""
+        return self._shard_session(await self.path_shard(session_id, user_id) or 0, read=read, consistent=True)
+
+    async def _flush_pending_writes(self) -> None:
+        """Wait for queued interactions without blocking the event loop."""
+        write_queue = self.sync_manager.write_queue
+        if write_queue is not None and write_queue.pending():
+            await asyncio.to_thread(write_queue.flush)
+
+    async def create_user(self, user_id: str, name: str) -> dict:
+        """Create a new user in the database."""
+        async with self.get_session(user_id) as session:
+            try:
+                await session.run_sync(db_queries.create_user, user_id, name)
+                await session.commit()
+                self.sync_manager.user_cache.invalidate(user_id)
+                self.sync_manager.bump_data_version(user_id)
+                return {"success": True, "user_id": user_id, "name": name}
+            except Exception as e:
+                await session.rollback()
+                return {"success": False, "error": str(e)}
+
+    async def get_user(self, user_id: str) -> dict | None:
+        """Get user by user_id."""
+        user_cache = self.sync_manager.user_cache
+        cached = user_cache.get(user_id)
+        if cached is not MISSING:
+            return dict(cached) if cached else None
+
+        async with self.get_read_session(user_id, consistent=True) as session:
+            user = await session.run_sync(db_queries.get_user, user_id)
+        user_cache.set(user_id, user)
+        return dict(user) if user else None
+
+    async def log_interaction(self, session_id: str, user_id: str, agent_name: str,
+                              query: str, response: str) -> bool:
+        """Log an interaction to the database (queued when write-behind is enabled)."""
+        write_queue = self.sync_manager.write_queue
+        if write_queue is not None:
+            self.sync_manager.bump_data_version(user_id, session_id)
+            return write_queue.put(session_id, user_id, agent_name, query, response)
+
+        async with self.get_session(user_id) as session:
+            try:
+                await session.run_sync(db_queries.log_interaction, session_id, user_id, agent_name, query, response)
+                await session.commit()
+                self.sync_manager.bump_data_version(user_id, session_id)
+                return True
+            except Exception:
+                await session.rollback()
+                return False
+
+    async def get_chat_history(self, user_id: str, session_id: str = None, limit: int = 20) -> list:
+        """Get recent chat history for a user, optionally filtered by session."""
+        await self._flush_pending_writes()
+        async with self.get_read_session(user_id, consistent=True) as session:
+            return await session.run_sync(db_queries.get_chat_history, user_id, session_id, limit)
+
+    async def get_chat_history_page(self, user_id: str, session_id: str = None,
+                                    before_id: int = None, limit: int = 20, before_time: datetime = None) -> dict:
+        """Get a page of chat history older than before_id or before_time (newest page if None)."""
+        await self._flush_pending_writes()
+        async with self.get_read_session(user_id, consistent=True) as session:
+            return await session.run_sync(
+                db_queries.get_chat_history_page, user_id, session_id, before_id, limit, before_time
+            )
+
+    async def search_history(self, user_id: str, text: str, limit: int = 10) -> list:
+        """Full-text search over a user's past queries and responses, best match first."""
+        await self._flush_pending_writes()
+        async with self.get_read_session(user_id, consistent=True) as session:
+            return await session.run_sync(db_queries.search_history, user_id, text, limit)
+
+    async def get_session_summary(self, user_id: str, session_id: str) -> dict:
+        """Message count, time span and agents of a chat session, archived turns included."""
+        await self._flush_pending_writes()
+        async with self.get_read_session(user_id, consistent=True) as session:
+            return await session.run_sync(db_queries.get_session_summary, user_id, session_id)
+
+    async def update_student_profile(self, user_id: str, subject: str, level: str, details: str = "{}") -> bool:
+        """Update or create a student profile for a subject."""
+        async with self.get_session(user_id) as session:
+            try:
+                await session.run_sync(db_queries.update_student_profile, user_id, subject, level, details)
+                await session.commit()
+                self.sync_manager.invalidate_user_caches(user_id)
+                self.sync_manager.bump_data_version(user_id)
+                return True
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating profile: {e}")
+                return False
+
+    async def get_student_profile(self, user_id: str, subject: str = None) -> list | dict:
+        """Get student profile(s). If subject is None, returns all subjects."""
+        profile_cache = self.sync_manager.profile_cache
+        key = (user_id, subject)
+        cached = profile_cache.get(key)
+        if cached is not MISSING:
+            return copy.deepcopy(cached)
+
+        async with self.get_read_session(user_id, consistent=True) as session:
+            profile = await session.run_sync(db_queries.get_student_profile, user_id, subject)
+        profile_cache.set(key, profile)
+        return copy.deepcopy(profile)
+
+    async def create_learning_path(self, user_id: str, session_id: str, subject: str, title: str) -> bool:
+        """Create a new learning path."""
+        async with self.get_session(user_id) as session:
+            try:
+                await session.run_sync(db_queries.create_learning_path, user_id, session_id, subject, title)
+                await session.commit()
+                self.sync_manager.session_shards.set(session_id, self.sync_manager.shard_index(user_id))
+                self.sync_manager.path_cache.invalidate(session_id)
+                self.sync_manager.invalidate_user_caches(user_id)
+                self.sync_manager.bump_data_version(user_id, session_id)
+                return True
+            except Exception as e:
+                await session.rollback()
+                print(f"Error creating learning path: {e}")
+                return False
+
+    async def update_learning_path_details(self, session_id: str, syllabus: str, user_id: str = None) -> bool:
+        """Update the syllabus for a specific learning path."""
+        async with await self._path_session(session_id, user_id) as session:
+            try:
+                if await session.run_sync(db_queries.update_learning_path_details, session_id, syllabus):
+                    await session.commit()
+                    self.sync_manager.path_cache.invalidate(session_id)
+                    self.sync_manager.bump_data_version(user_id, session_id)
+                    return True
+                return False
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating path syllabus: {e}")
+                return False
+
+    async def set_module_status(self, session_id: str, module: str, status: str, user_id: str = None) -> bool:
+        """Set one syllabus module's status ('pending', 'in_progress', 'completed')."""
+        async with await self._path_session(session_id, user_id) as session:
+            try:
+                if await session.run_sync(db_queries.set_module_status, session_id, module, status):
+                    await session.commit()
+                    self.sync_manager.path_cache.invalidate(session_id)
+                    self.sync_manager.bump_data_version(user_id, session_id)
+                    return True
+                return False
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating module status: {e}")
+                return False
+
+    async def apply_syllabus_patch(self, session_id: str, module_status: dict | None = None,
+                                   current_topic: str | None = None, user_id: str = None) -> dict:
+        """Apply a small progress change to a path's syllabus server-side."""
+        async with await self._path_session(session_id, user_id) as session:
+            try:
+                result = await session.run_sync(db_queries.apply_syllabus_patch, session_id, module_status, current_topic)
+                if result["success"]:
+                    await session.commit()
+                    self.sync_manager.path_cache.invalidate(session_id)
+                    self.sync_manager.bump_data_version(user_id, session_id)
+                else:
+                    await session.rollback()
+                return result
+            except Exception as e:
+                await session.rollback()
+                print(f"Error patching syllabus: {e}")
+                return {"success": False, "syllabus_hash": None, "unknown_modules": [], "error": str(e)}
+
+    async def get_syllabus_progress(self, session_id: str, user_id: str = None) -> dict:
+        """Module counts per status plus completion ratio for a learning path."""
+        async with await self._path_session(session_id, user_id, read=True) as session:
+            return await session.run_sync(db_queries.get_syllabus_progress, session_id)
+
+    async def get_learning_paths(self, user_id: str, include_syllabus: bool = True) -> list:
+        """Get all learning paths for a user."""
+        async with self.get_read_session(user_id, consistent=True) as session:
+            return await session.run_sync(db_queries.get_learning_paths, user_id, include_syllabus)
+
+    async def get_learning_path_by_session(self, session_id: str, user_id: str = None) -> dict | None:
+        """Get the learning path for a chat session, or None if it has none yet."""
+        path_cache = self.sync_manager.path_cache
+        cached = path_cache.get(session_id)
+        if cached is not MISSING:
+            return dict(cached) if cached else None
+
+        async with await self._path_session(session_id, user_id, read=True) as session:
+            path = await session.run_sync(db_queries.get_learning_path_by_session, session_id)
+        path_cache.set(session_id, path)
+        return dict(path) if path else None
+
+    async def get_dashboard(self, user_id: str, session_id: str, history_limit: int = 0) -> dict:
+        """Paths, active path with modules and progress, profile and first history page."""
+        if history_limit:
+            await self._flush_pending_writes()
+        async with self.get_read_session(user_id, consistent=True) as session:
+            return await session.run_sync(db_queries.get_dashboard, user_id, session_id, history_limit)
+
+async_db_manager = LazyManager(AsyncDBManager)
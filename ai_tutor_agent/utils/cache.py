@@ -0,0 +1,126 @@
+"""Small in-process caches for hot database rows."""
+from collections import OrderedDict
+import threading
+import time
+
+# Returned by LRUCache.get() on a miss, so None can be cached as a value
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a fixed number of entries and optional TTL.
+
+    Safe to share between Streamlit script threads and the tool event loops;
+    every operation holds the cache lock for O(1) work only.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float | None = None):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        """Return the cached value or MISSING."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate) -> None:
+        """Drop every entry whose key satisfies predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "max_entries": self._max_entries,
+                "ttl": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class VersionClock:
+    """Change counters for keys, for caches of data derived from several rows.
+
+    Every ``bump()`` stamps its keys with the next value of one shared clock,
+    and a key seen for the first time (or again after being evicted) reads
+    as the current clock. So ``version()`` only ever grows, and anything
+    cached under an older version can't be served after a bump.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self._max_entries = max_entries
+        self._clock = 0
+        self._versions: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, *keys) -> int:
+        """Current version of the newest of keys."""
+        with self._lock:
+            newest = 0
+            for key in keys:
+                value = self._versions.get(key)
+                if value is None:
+                    value = self._versions[key] = self._clock
+                    self._trim()
+                self._versions.move_to_end(key)
+                newest = max(newest, value)
+            return newest
+
+    def bump(self, *keys) -> int:
+        """Give keys a new version. Returns it."""
+        with self._lock:
+            self._clock += 1
+            for key in keys:
+                self._versions[key] = self._clock
+                self._versions.move_to_end(key)
+            self._trim()
+            return self._clock
+
+    def _trim(self) -> None:
+        while len(self._versions) > self._max_entries:
+            self._versions.popitem(last=False)
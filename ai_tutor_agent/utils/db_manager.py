@@ -1,135 +1,405 @@
 """Database manager for persistent storage."""
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Engine
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import create_engine, event, inspect, Engine
 from sqlalchemy.orm import sessionmaker, Session as SQLSession
+from sqlalchemy.pool import StaticPool
 from datetime import datetime
+import copy
 import os
+import threading
+import time
+import zlib
+
+from ai_tutor_agent.utils.models import Base, User, Interaction, StudentProfile, LearningPath
+from ai_tutor_agent.utils import db_queries, text_store, search_index
+from ai_tutor_agent.utils.write_queue import InteractionWriteQueue
+from ai_tutor_agent.utils.cache import LRUCache, MISSING, VersionClock
+from ai_tutor_agent.utils.migrations import run_migrations
+
+
+def engine_options(db_uri: str, read_only: bool = False) -> dict:
+    """create_engine() keyword arguments tuned for multithreaded SQLite access.
+
+    ``read_only`` engines size their pool from DB_READ_POOL_SIZE and
+    DB_READ_MAX_OVERFLOW, falling back to the primary's settings.
+    """
+    if not db_uri.startswith("sqlite"):
+        return {"pool_pre_ping": True}
+
+    options = {
+        # Streamlit runs each script in its own thread; connections are
+        # handed between threads by the pool, never shared concurrently.
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")) / 1000,
+        },
+    }
+    if ":memory:" in db_uri:
+        # Every connection to :memory: is a separate empty database; share one
+        options["poolclass"] = StaticPool
+    else:
+        pool_size = os.getenv("DB_POOL_SIZE", "10")
+        max_overflow = os.getenv("DB_MAX_OVERFLOW", "20")
+        if read_only:
+            pool_size = os.getenv("DB_READ_POOL_SIZE", pool_size)
+            max_overflow = os.getenv("DB_READ_MAX_OVERFLOW", max_overflow)
+        options["pool_size"] = int(pool_size)
+        options["max_overflow"] = int(max_overflow)
+    return options
+
+
+def enable_sqlite_wal(engine: Engine, read_only: bool = False) -> None:
+    """Switch every new SQLite connection to WAL with a busy timeout.
+
+    WAL lets readers proceed while a writer holds the lock, and
+    synchronous=NORMAL drops the per-commit fsync to one per checkpoint.
+    ``read_only`` connections can't change the journal mode (the primary
+    already did); they only get the busy timeout and ``query_only``.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    busy_timeout_ms = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if read_only:
+            cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+            cursor.execute("PRAGMA query_only=1")
+        else:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def read_only_uri(db_uri: str) -> str | None:
+    """Read-only twin of a SQLite file URI, or None if there is none.
+
+    ``sqlite:///ai_tutor.db`` gives ``sqlite:///file:ai_tutor.db?mode=ro&uri=true``,
+    which opens the same file through SQLite's URI syntax so writes fail.
+    """
+    if not db_uri.startswith("sqlite") or ":memory:" in db_uri:
+        return None
+    prefix, sep, rest = db_uri.partition(":///")
+    if not sep:
+        return None
+    path, _, query = rest.partition("?")
+    if path.startswith("file:"):
+        path = path[len("file:"):]
+    params = [p for p in query.split("&") if p and p.split("=")[0] not in ("mode", "uri")]
+    return f"{prefix}:///file:{path}?" + "&".join(params + ["mode=ro", "uri=true"])
+
+
+def engine_pool_stats(engine: Engine) -> dict:
+    """Size and checked-in/out connection counts of an engine's pool."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    for key in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, key):
+            stats[key] = getattr(pool, key)()
+    return stats
+
+
+def shard_uris(db_uri: str, count: int) -> list:
+    """URIs of the shard databases; shard 0 is db_uri itself.
+
+    ``sqlite:///ai_tutor.db`` with 3 shards gives ai_tutor.db,
+    ai_tutor.shard1.db and ai_tutor.shard2.db.
+    """
+    if count <= 1:
+        return [db_uri]
+    if not db_uri.startswith("sqlite"):
+        print("⚠️ DATABASE_SHARDS is only supported for SQLite; using a single database")
+        return [db_uri]
+    if ":memory:" in db_uri:
+        # Each engine gets its own private in-memory database
+        return [db_uri] * count
+    path, sep, query = db_uri.partition("?")
+    base, ext = os.path.splitext(path)
+    return [db_uri] + [f"{base}.shard{i}{ext}{sep}{query}" for i in range(1, count)]
+
+
+def text_codec_from_env() -> text_store.TextCodec | None:
+    """Codec for large text columns: DB_TEXT_COMPRESSION=auto|zstd|zlib|off."""
+    algorithm = os.getenv("DB_TEXT_COMPRESSION", "auto").lower()
+    if algorithm in ("off", "none", "false", "0"):
+        return None
+    return text_store.TextCodec(
+        min_bytes=int(os.getenv("DB_COMPRESS_MIN_BYTES", "512")),
+        algorithm=None if algorithm == "auto" else algorithm,
+    )
 
-Base = declarative_base()
-
-class User(Base):
-    __tablename__ = 'users'
-    user_id = Column(String(100), primary_key=True)
-    name = Column(String(200), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-class Interaction(Base):
-    __tablename__ = 'interactions'
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    session_id = Column(String(100), nullable=False, index=True)
-    user_id = Column(String(100), nullable=False, index=True)
-    agent_name = Column(String(100))
-    query = Column(Text)
-    response = Column(Text)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-
-class StudentProfile(Base):
-    __tablename__ = 'student_profiles'
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(String(100), nullable=False, index=True)
-    subject = Column(String(50), nullable=False)  # e.g., 'dsa', 'math'
-    level = Column(String(50), default='beginner')  # e.g., 'beginner', 'intermediate'
-    details = Column(Text, default='{}')  # JSON string for granular tracking
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-class LearningPath(Base):
-    __tablename__ = 'learning_paths'
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(String(100), nullable=False, index=True)
-    session_id = Column(String(100), nullable=False, unique=True)
-    subject = Column(String(50), nullable=False)
-    title = Column(String(200), nullable=False)
-    syllabus = Column(Text, default='{}')  # JSON string for path-specific syllabus
-    created_at = Column(DateTime, default=datetime.utcnow)
 
 class DBManager:
     """Singleton database manager for user and interaction storage."""
     
     _instance = None
-    engine: Engine
+    _lock = threading.Lock()
+    _db_uri: str | None = None
+    db_uri: str
+    engine: Engine  # shard 0, which also holds ADK's session tables
     Session: sessionmaker[SQLSession]
+    engines: list[Engine]
+    Sessions: list[sessionmaker[SQLSession]]
+    read_engines: list[Engine]  # per shard; the primary engine itself if reads aren't split
+    read_Sessions: list[sessionmaker[SQLSession]]
+    read_is_replica: bool
+    session_shards: LRUCache
+    write_queue: InteractionWriteQueue | None
+    text_codec: text_store.TextCodec | None
+    session_info: dict
+    path_cache: LRUCache
+    user_cache: LRUCache
+    profile_cache: LRUCache
+    data_versions: VersionClock
+    startup_stats: dict
     
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DBManager, cls).__new__(cls)
-            db_uri = os.getenv("DATABASE_URI", "sqlite:///ai_tutor.db")
-            cls._instance.engine = create_engine(db_uri, echo=False)
-            Base.metadata.create_all(cls._instance.engine)
-            cls._instance.Session = sessionmaker(bind=cls._instance.engine)
-            
-            # Auto-Migration for 'syllabus' column
-            # SQLite doesn't support "IF NOT EXISTS" for ADD COLUMN nicely, so we try/except
-            from sqlalchemy import text
-            try:
-                with cls._instance.engine.connect() as conn:
-                    conn.execute(text("ALTER TABLE learning_paths ADD COLUMN syllabus TEXT DEFAULT '{}'"))
-            except Exception:
-                # Column likely exists
-                pass
-            
-            cls._instance._check_and_migrate(db_uri)
-            
+        if cls._instance is not None:
+            return cls._instance
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls._create()
         return cls._instance
 
-    def _check_and_migrate(self, db_uri: str):
-        """Ensure database schema is up to date (specifically for SQLite)."""
-        if not db_uri.startswith("sqlite:///"):
-            return
+    @classmethod
+    def _create(cls) -> "DBManager":
+        self = super(DBManager, cls).__new__(cls)
+        started = time.perf_counter()
+        self.db_uri = db_uri = cls._db_uri or os.getenv("DATABASE_URI", "sqlite:///ai_tutor.db")
+        # Users are spread over DATABASE_SHARDS files by a hash of user_id, so
+        # each file has its own writer lock. Changing the count re-homes users;
+        # set it once, before the first user is created.
+        self.engines = []
+        shard_stats = []
+        for uri in shard_uris(db_uri, int(os.getenv("DATABASE_SHARDS", "1"))):
+            engine = create_engine(uri, echo=False, **engine_options(uri))
+            enable_sqlite_wal(engine)
+            shard_stats.append(run_migrations(engine))
+            self.engines.append(engine)
+        self.engine = self.engines[0]
+        self.startup_stats = shard_stats[0]
+        self.startup_stats["shards"] = len(self.engines)
 
-        # Extract path from URI
-        # Handle 'sqlite:///file.db' -> 'file.db' (relative)
-        # Handle 'sqlite:////abs/path/file.db' -> '/abs/path/file.db' (absolute)
-        db_path = db_uri.replace("sqlite:///", "")
-        
-        if not os.path.exists(db_path) and db_path != ':memory:':
-             pass
+        # Read by db_queries through session.info; see text_store and search_index
+        self.session_info = {
+            "text_codec": text_codec_from_env(),
+            "search_index": inspect(self.engine).has_table(search_index.FTS_TABLE),
+        }
+        self.text_codec = self.session_info["text_codec"]
+        self.Sessions = [sessionmaker(bind=engine, info=self.session_info) for engine in self.engines]
+        self.Session = self.Sessions[0]
+        self._create_read_engines()
+        # Read-through caches, invalidated by writes made through this
+        # process; the TTL bounds staleness from other processes.
+        cache_size = int(os.getenv("DB_CACHE_SIZE", "1024"))
+        cache_ttl = float(os.getenv("DB_CACHE_TTL_SECONDS", "300"))
+        # session_id -> learning path dict (or None)
+        self.path_cache = LRUCache(cache_size, cache_ttl)
+        # user_id -> user dict (or None)
+        self.user_cache = LRUCache(cache_size, cache_ttl)
+        # (user_id, subject or None) -> profile dict / list (or None)
+        self.profile_cache = LRUCache(cache_size, cache_ttl)
+        # session_id -> shard index of its learning path; paths never move
+        self.session_shards = LRUCache(cache_size)
+        # ("user", user_id) / ("session", session_id) -> change counter, for
+        # caches of whole pages (see data_version())
+        self.data_versions = VersionClock(cache_size * 4)
 
-        if not os.path.exists(db_path):
-             return
+        # Optional write-behind batching for log_interaction
+        self.write_queue = None
+        if os.getenv("DB_WRITE_BEHIND", "false").lower() in ("1", "true", "yes"):
+            self.write_queue = InteractionWriteQueue(
+                self.get_session,
+                batch_size=int(os.getenv("DB_WRITE_BATCH_SIZE", "50")),
+                flush_interval=int(os.getenv("DB_WRITE_FLUSH_MS", "500")) / 1000,
+                shard_key=self.shard_index,
+            )
 
-        import sqlite3
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Check if 'events' table exists (it might not if create_all hasn't run yet, 
-            # or if it's a legacy DB that does have it)
-            tables = cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='events'").fetchall()
-            if not tables:
-                conn.close()
-                return
-
-            columns = [info[1] for info in cursor.execute("PRAGMA table_info(events)").fetchall()]
-            
-            missing_columns = [
-                ("input_transcription", "TEXT"),
-                ("output_transcription", "TEXT")
-            ]
-            
-            for col_name, col_type in missing_columns:
-                if col_name not in columns:
-                    print(f"🔧 Migrating DB: Adding missing column '{col_name}'...")
-                    try:
-                        cursor.execute(f"ALTER TABLE events ADD COLUMN {col_name} {col_type}")
-                        conn.commit()
-                    except Exception as e:
-                        print(f"⚠️ Migration warning: {e}")
-                        
-            conn.close()
-        except Exception as e:
-            print(f"⚠️ DB Migration check failed: {e}")
-    
-    def get_session(self) -> SQLSession:
-        """Get a new database session."""
-        return self.Session()
+        self.startup_stats["total_ms"] = (time.perf_counter() - started) * 1000
+        return self
+
+    def _create_read_engines(self) -> None:
+        """Set up the engines read-only methods route to.
+
+        DATABASE_READ_URI points reads at a replica (sharded like
+        DATABASE_URI). Otherwise each SQLite file shard gets a second,
+        read-only engine on the same file with its own pool, so long reads
+        never hold connections writers are waiting for. DB_READ_POOL=false,
+        or a database neither applies to, keeps reads on the primary.
+        """
+        replica_uri = os.getenv("DATABASE_READ_URI")
+        split = os.getenv("DB_READ_POOL", "true").lower() in ("1", "true", "yes")
+        if replica_uri:
+            read_uris = shard_uris(replica_uri, len(self.engines))
+        elif split:
+            read_uris = [read_only_uri(engine.url.render_as_string(hide_password=False)) for engine in self.engines]
+        else:
+            read_uris = [None] * len(self.engines)
+        if len(read_uris) != len(self.engines):
+            print("⚠️ DATABASE_READ_URI can't be sharded like DATABASE_URI; reading from the primary")
+            read_uris = [None] * len(self.engines)
+
+        # A replica may lag; read-your-writes paths stay on the primary then
+        self.read_is_replica = bool(replica_uri) and any(read_uris)
+        self.read_engines, self.read_Sessions = [], []
+        for index, uri in enumerate(read_uris):
+            if uri is None:
+                self.read_engines.append(self.engines[index])
+                self.read_Sessions.append(self.Sessions[index])
+                continue
+            engine = create_engine(uri, echo=False, **engine_options(uri, read_only=True))
+            enable_sqlite_wal(engine, read_only=True)
+            self.read_engines.append(engine)
+            self.read_Sessions.append(sessionmaker(bind=engine, info=self.session_info))
+
+    @classmethod
+    def configure(cls, db_uri: str | None = None) -> None:
+        """Use db_uri (default: DATABASE_URI) from the next access on.
+
+        Closes the current instance, if any. Tests can pass
+        ``"sqlite:///:memory:"`` for a private in-memory database.
+        """
+        with cls._lock:
+            old, cls._instance = cls._instance, None
+            cls._db_uri = db_uri
+        if old is not None:
+            old.close()
+
+    def close(self) -> None:
+        """Flush queued writes and release every pooled connection."""
+        if self.write_queue is not None:
+            self.write_queue.close()
+        for engine in self.engines:
+            engine.dispose()
+        for engine in self.read_engines:
+            if engine not in self.engines:
+                engine.dispose()
+
+    def shard_index(self, user_id: str) -> int:
+        """Shard holding user_id's rows (stable crc32 hash)."""
+        return zlib.crc32(user_id.encode("utf-8")) % len(self.engines)
+
+    def _shard_session(self, index: int, read: bool = False, consistent: bool = False) -> SQLSession:
+        """Session on shard ``index``: the read engine if ``read``, else the primary.
+
+        ``consistent`` reads must see this process's latest commits, so they
+        skip a (possibly lagging) replica.
+        """
+        if read and not (consistent and self.read_is_replica):
+            return self.read_Sessions[index]()
+        return self.Sessions[index]()
+
+    def get_session(self, user_id: str = None) -> SQLSession:
+        """Get a new database session on user_id's shard (shard 0 if None)."""
+        return self._shard_session(self.shard_index(user_id) if user_id else 0)
+
+    def get_read_session(self, user_id: str = None, consistent: bool = False) -> SQLSession:
+        """Get a new read-only session on user_id's shard; see _shard_session()."""
+        return self._shard_session(self.shard_index(user_id) if user_id else 0, read=True, consistent=consistent)
+
+    def path_shard(self, session_id: str, user_id: str = None) -> int | None:
+        """Shard holding the learning path of session_id, or None if it has none.
+
+        Pass the owner's user_id whenever it is known: without it and with
+        several shards, an uncached session_id is looked up on every shard.
+        """
+        if user_id:
+            return self.shard_index(user_id)
+        if len(self.engines) == 1:
+            return 0
+        cached = self.session_shards.get(session_id)
+        if cached is not MISSING:
+            return cached
+
+        for index in range(len(self.engines)):
+            session = self._shard_session(index, read=True, consistent=True)
+            try:
+                owner = db_queries.get_path_owner(session, session_id)
+            finally:
+                session.close()
+            if owner is not None:
+                self.session_shards.set(session_id, index)
+                return index
+        return None
+
+    def _path_session(self, session_id: str, user_id: str = None, read: bool = False) -> SQLSession:
+        """Session on the shard of session_id's learning path (shard 0 if unknown)."""
+        return self._shard_session(self.path_shard(session_id, user_id) or 0, read=read, consistent=True)
+
+    def shard_stats(self) -> list:
+        """Row counts per shard, for spotting imbalance."""
+        stats = []
+        for index, Session in enumerate(self.read_Sessions):
+            session = Session()
+            try:
+                counts = db_queries.table_counts(session)
+            finally:
+                session.close()
+            stats.append({"shard": index, "uri": self.engines[index].url.render_as_string(), **counts})
+        return stats
+
+    def pool_stats(self) -> list:
+        """Connection pool usage of every engine, primary and read, per shard."""
+        stats = []
+        for index, engine in enumerate(self.engines):
+            stats.append({"shard": index, "role": "primary", **engine_pool_stats(engine)})
+            read_engine = self.read_engines[index]
+            if read_engine is not engine:
+                role = "replica" if self.read_is_replica else "read"
+                stats.append({"shard": index, "role": role, **engine_pool_stats(read_engine)})
+        return stats
+
+    def invalidate_user_caches(self, user_id: str) -> None:
+        """Forget cached user and profile rows for user_id."""
+        self.user_cache.invalidate(user_id)
+        self.profile_cache.invalidate_where(lambda key: key[0] == user_id)
+
+    def data_version(self, user_id: str, session_id: str = None) -> int:
+        """Counter that changes whenever this process writes user_id's rows.
+
+        Also covers rows keyed only by session_id (its learning path and
+        syllabus). Use it in cache keys of data built from several queries,
+        like get_dashboard(); writes from other processes aren't seen, so
+        such caches still want a TTL.
+        """
+        return self.data_versions.version(("user", user_id), ("session", session_id))
+
+    def bump_data_version(self, user_id: str = None, session_id: str = None) -> None:
+        """Mark user_id's and/or session_id's rows as changed."""
+        keys = []
+        if user_id:
+            keys.append(("user", user_id))
+        if session_id:
+            keys.append(("session", session_id))
+        self.data_versions.bump(*keys)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss statistics for the read-through caches."""
+        return {
+            "users": self.user_cache.stats(),
+            "profiles": self.profile_cache.stats(),
+            "paths": self.path_cache.stats(),
+        }
+
+    def flush_pending_writes(self) -> None:
+        """Commit queued interactions so the next read sees them."""
+        if self.write_queue is not None and self.write_queue.pending():
+            self.write_queue.flush()
+
+    def write_queue_stats(self) -> dict | None:
+        """Queue depth and flush latency of the write-behind logger, if enabled."""
+        return self.write_queue.get_stats() if self.write_queue is not None else None
     
     def create_user(self, user_id: str, name: str) -> dict:
         """Create a new user in the database."""
-        session = self.get_session()
+        session = self.get_session(user_id)
         try:
-            user = User(user_id=user_id, name=name)
-            session.add(user)
+            db_queries.create_user(session, user_id, name)
             session.commit()
+            self.user_cache.invalidate(user_id)
+            self.bump_data_version(user_id)
             return {"success": True, "user_id": user_id, "name": name}
         except Exception as e:
             session.rollback()
@@ -139,30 +409,36 @@ class DBManager:
     
     def get_user(self, user_id: str) -> dict | None:
         """Get user by user_id."""
-        session = self.get_session()
+        cached = self.user_cache.get(user_id)
+        if cached is not MISSING:
+            return dict(cached) if cached else None
+
+        session = self.get_read_session(user_id, consistent=True)
         try:
-            user = session.query(User).filter_by(user_id=user_id).first()
-            if user:
-                return {"user_id": user.user_id, "name": user.name}
-            return None
+            user = db_queries.get_user(session, user_id)
         finally:
             session.close()
+        self.user_cache.set(user_id, user)
+        return dict(user) if user else None
     
 
     def log_interaction(self, session_id: str, user_id: str, agent_name: str, 
                        query: str, response: str) -> bool:
-        """Log an interaction to the database."""
-        session = self.get_session()
+        """Log an interaction to the database.
+
+        With write-behind enabled the row is queued and committed with its
+        batch; the return value then only reports that it was accepted.
+        """
+        if self.write_queue is not None:
+            # Readers of history flush the queue first, so the row counts as written
+            self.bump_data_version(user_id, session_id)
+            return self.write_queue.put(session_id, user_id, agent_name, query, response)
+
+        session = self.get_session(user_id)
         try:
-            interaction = Interaction(
-                session_id=session_id,
-                user_id=user_id,
-                agent_name=agent_name,
-                query=query,
-                response=response
-            )
-            session.add(interaction)
+            db_queries.log_interaction(session, session_id, user_id, agent_name, query, response)
             session.commit()
+            self.bump_data_version(user_id, session_id)
             return True
         except:
             session.rollback()
@@ -172,46 +448,111 @@ class DBManager:
 
     def get_chat_history(self, user_id: str, session_id: str = None, limit: int = 20) -> list:
         """Get recent chat history for a user, optionally filtered by session."""
-        session = self.get_session()
+        self.flush_pending_writes()
+        session = self.get_read_session(user_id, consistent=True)
+        try:
+            return db_queries.get_chat_history(session, user_id, session_id, limit)
+        finally:
+            session.close()
+
+    def get_chat_history_page(self, user_id: str, session_id: str = None,
+                              before_id: int = None, limit: int = 20, before_time: datetime = None) -> dict:
+        """Get a page of chat history older than before_id or before_time (newest page if None).
+
+        Returns ``{"messages": [...], "has_more": bool, "next_before_id": int | None}``
+        with messages in chronological order; pass ``next_before_id`` back to
+        fetch the previous page.
+        """
+        self.flush_pending_writes()
+        session = self.get_read_session(user_id, consistent=True)
         try:
-            query = session.query(Interaction).filter_by(user_id=user_id)
-            if session_id:
-                query = query.filter_by(session_id=session_id)
-            
-            interactions = query.order_by(Interaction.timestamp.desc()).limit(limit).all()
-            
-            # Return reversed to show chronological order
-            return [{
-                "id": i.id,
-                "agent": i.agent_name,
-                "query": i.query,
-                "response": i.response if i.response else "Thinking...", # Handle pending
-                "timestamp": i.timestamp.isoformat()
-            } for i in reversed(interactions)]
+            return db_queries.get_chat_history_page(session, user_id, session_id, before_id, limit, before_time)
         finally:
             session.close()
 
+    def search_history(self, user_id: str, text: str, limit: int = 10) -> list:
+        """Full-text search over a user's past queries and responses, best match first.
+
+        Each hit has session_id, agent, timestamp, the highlighted query and a
+        response snippet. Returns [] when SQLite lacks FTS5.
+        """
+        self.flush_pending_writes()
+        session = self.get_read_session(user_id, consistent=True)
+        try:
+            return db_queries.search_history(session, user_id, text, limit)
+        finally:
+            session.close()
+
+    def get_session_summary(self, user_id: str, session_id: str) -> dict:
+        """Message count, time span and agents of a chat session, archived turns included."""
+        self.flush_pending_writes()
+        session = self.get_read_session(user_id, consistent=True)
+        try:
+            return db_queries.get_session_summary(session, user_id, session_id)
+        finally:
+            session.close()
+
+    def archive_interactions(self, older_than: datetime, batch_size: int = 500) -> dict:
+        """Move one batch (per shard) of interactions older than the cutoff to the archive.
+
+        Returns ``{"archived": rows, "sessions": sessions touched}`` summed over
+        shards; call again until ``archived`` is below ``batch_size``.
+        """
+        totals = {"archived": 0, "sessions": 0}
+        for Session in self.Sessions:
+            session = Session()
+            try:
+                result = db_queries.archive_interactions(session, older_than, batch_size)
+                session.commit()
+                # History pages cached by the web app may hold the moved rows
+                for user_id, session_id in result["touched"]:
+                    self.bump_data_version(user_id, session_id)
+                totals["archived"] += result["archived"]
+                totals["sessions"] += result["sessions"]
+            except Exception as e:
+                session.rollback()
+                print(f"Error archiving interactions: {e}")
+            finally:
+                session.close()
+        return totals
+
+    def gc_text_blobs(self) -> int:
+        """Delete compressed text blobs that no row references any more, on every shard."""
+        deleted = 0
+        for Session in self.Sessions:
+            session = Session()
+            try:
+                deleted += text_store.gc_text_blobs(session)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"Error collecting text blobs: {e}")
+            finally:
+                session.close()
+        return deleted
+
+    def text_blob_stats(self) -> dict:
+        """Number of stored blobs and their compressed vs. original size, over all shards."""
+        totals = {"blobs": 0, "stored_bytes": 0, "original_bytes": 0}
+        for Session in self.read_Sessions:
+            session = Session()
+            try:
+                stats = text_store.text_blob_stats(session)
+            finally:
+                session.close()
+            for key in totals:
+                totals[key] += stats[key]
+        totals["ratio"] = totals["stored_bytes"] / totals["original_bytes"] if totals["original_bytes"] else 1.0
+        return totals
+
     def update_student_profile(self, user_id: str, subject: str, level: str, details: str = "{}") -> bool:
         """Update or create a student profile for a subject."""
-        session = self.get_session()
+        session = self.get_session(user_id)
         try:
-            profile = session.query(StudentProfile).filter_by(
-                user_id=user_id, subject=subject
-            ).first()
-            
-            if profile:
-                profile.level = level
-                profile.details = details
-            else:
-                profile = StudentProfile(
-                    user_id=user_id,
-                    subject=subject,
-                    level=level,
-                    details=details
-                )
-                session.add(profile)
-            
+            db_queries.update_student_profile(session, user_id, subject, level, details)
             session.commit()
+            self.invalidate_user_caches(user_id)
+            self.bump_data_version(user_id)
             return True
         except Exception as e:
             session.rollback()
@@ -222,39 +563,31 @@ class DBManager:
 
     def get_student_profile(self, user_id: str, subject: str = None) -> list | dict:
         """Get student profile(s). If subject is None, returns all subjects."""
-        session = self.get_session()
+        key = (user_id, subject)
+        cached = self.profile_cache.get(key)
+        if cached is not MISSING:
+            return copy.deepcopy(cached)
+
+        # Cached for the TTL, so it must not come from a replica that hasn't
+        # caught up with the write that just invalidated it
+        session = self.get_read_session(user_id, consistent=True)
         try:
-            if subject:
-                profile = session.query(StudentProfile).filter_by(
-                    user_id=user_id, subject=subject
-                ).first()
-                return {
-                    "subject": profile.subject,
-                    "level": profile.level,
-                    "details": profile.details
-                } if profile else None
-            else:
-                profiles = session.query(StudentProfile).filter_by(user_id=user_id).all()
-                return [{
-                    "subject": p.subject,
-                    "level": p.level,
-                    "details": p.details
-                } for p in profiles]
+            profile = db_queries.get_student_profile(session, user_id, subject)
         finally:
             session.close()
+        self.profile_cache.set(key, profile)
+        return copy.deepcopy(profile)
 
     def create_learning_path(self, user_id: str, session_id: str, subject: str, title: str) -> bool:
         """Create a new learning path."""
-        session = self.get_session()
+        session = self.get_session(user_id)
         try:
-            path = LearningPath(
-                user_id=user_id,
-                session_id=session_id,
-                subject=subject.lower(), # Normalize
-                title=title
-            )
-            session.add(path)
+            db_queries.create_learning_path(session, user_id, session_id, subject, title)
             session.commit()
+            self.session_shards.set(session_id, self.shard_index(user_id))
+            self.path_cache.invalidate(session_id)
+            self.invalidate_user_caches(user_id)
+            self.bump_data_version(user_id, session_id)
             return True
         except Exception as e:
             session.rollback()
@@ -263,14 +596,14 @@ class DBManager:
         finally:
             session.close()
 
-    def update_learning_path_details(self, session_id: str, syllabus: str) -> bool:
+    def update_learning_path_details(self, session_id: str, syllabus: str, user_id: str = None) -> bool:
         """Update the syllabus for a specific learning path."""
-        session = self.get_session()
+        session = self._path_session(session_id, user_id)
         try:
-            path = session.query(LearningPath).filter_by(session_id=session_id).first()
-            if path:
-                path.syllabus = syllabus
+            if db_queries.update_learning_path_details(session, session_id, syllabus):
                 session.commit()
+                self.path_cache.invalidate(session_id)
+                self.bump_data_version(user_id, session_id)
                 return True
             return False
         except Exception as e:
@@ -280,20 +613,245 @@ class DBManager:
         finally:
             session.close()
 
-    def get_learning_paths(self, user_id: str) -> list:
-        """Get all learning paths for a user."""
-        session = self.get_session()
+    def set_module_status(self, session_id: str, module: str, status: str, user_id: str = None) -> bool:
+        """Set one syllabus module's status ('pending', 'in_progress', 'completed').
+
+        A single-row update; the JSON returned by the path getters reflects it.
+        """
+        session = self._path_session(session_id, user_id)
+        try:
+            if db_queries.set_module_status(session, session_id, module, status):
+                session.commit()
+                self.path_cache.invalidate(session_id)
+                self.bump_data_version(user_id, session_id)
+                return True
+            return False
+        except Exception as e:
+            session.rollback()
+            print(f"Error updating module status: {e}")
+            return False
+        finally:
+            session.close()
+
+    def apply_syllabus_patch(self, session_id: str, module_status: dict | None = None,
+                             current_topic: str | None = None, user_id: str = None) -> dict:
+        """Apply a small progress change to a path's syllabus server-side.
+
+        Args:
+            module_status: {module name: new status} for the modules that changed.
+            current_topic: New current topic, if it changed.
+
+        Returns ``{"success", "syllabus_hash", "unknown_modules"}``; the hash
+        identifies the resulting document so callers never need to re-send it.
+        """
+        session = self._path_session(session_id, user_id)
+        try:
+            result = db_queries.apply_syllabus_patch(session, session_id, module_status, current_topic)
+            if result["success"]:
+                session.commit()
+                self.path_cache.invalidate(session_id)
+                self.bump_data_version(user_id, session_id)
+            else:
+                session.rollback()
+            return result
+        except Exception as e:
+            session.rollback()
+            print(f"Error patching syllabus: {e}")
+            return {"success": False, "syllabus_hash": None, "unknown_modules": [], "error": str(e)}
+        finally:
+            session.close()
+
+    def get_syllabus_progress(self, session_id: str, user_id: str = None) -> dict:
+        """Module counts per status plus completion ratio for a learning path."""
+        session = self._path_session(session_id, user_id, read=True)
+        try:
+            return db_queries.get_syllabus_progress(session, session_id)
+        finally:
+            session.close()
+
+    def get_learning_paths(self, user_id: str, include_syllabus: bool = True) -> list:
+        """Get all learning paths for a user.
+
+        Pass include_syllabus=False for list views that only need titles.
+        """
+        session = self.get_read_session(user_id, consistent=True)
+        try:
+            return db_queries.get_learning_paths(session, user_id, include_syllabus)
+        finally:
+            session.close()
+
+    def get_learning_path_by_session(self, session_id: str, user_id: str = None) -> dict | None:
+        """Get the learning path for a chat session, or None if it has none yet.
+
+        Like every session-keyed method, takes the owner's user_id as a shard
+        hint; see path_shard().
+        """
+        cached = self.path_cache.get(session_id)
+        if cached is not MISSING:
+            return dict(cached) if cached else None
+
+        session = self._path_session(session_id, user_id, read=True)
+        try:
+            path = db_queries.get_learning_path_by_session(session, session_id)
+        finally:
+            session.close()
+        self.path_cache.set(session_id, path)
+        return dict(path) if path else None
+
+    def get_dashboard(self, user_id: str, session_id: str, history_limit: int = 0) -> dict:
+        """Everything the chat page reads for one user and chat session, in one transaction.
+
+        Returns ``{"paths", "current_path", "syllabus", "modules", "progress",
+        "profile", "history"}``: the user's paths (no syllabus), the one bound
+        to session_id (or None) with its parsed Syllabus, that syllabus's
+        modules as ``{"module", "status", "subtopics"}`` dicts and its module
+        counts per status, the path subject's ``{"subject", "level"}``
+        profile, and the newest history page as get_chat_history_page()
+        returns it (None if history_limit is 0).
+        """
+        if history_limit:
+            self.flush_pending_writes()
+        session = self.get_read_session(user_id, consistent=True)
         try:
-            paths = session.query(LearningPath).filter_by(user_id=user_id).order_by(LearningPath.created_at.desc()).all()
-            return [{
-                "id": p.id,
-                "session_id": p.session_id,
-                "subject": p.subject,
-                "title": p.title,
-                "syllabus": p.syllabus,
-                "created_at": p.created_at.isoformat()
-            } for p in paths]
+            return db_queries.get_dashboard(session, user_id, session_id, history_limit)
         finally:
             session.close()
 
-db_manager = DBManager()
+    def save_session_snapshot(self, app_name: str, user_id: str, session_id: str,
+                              data: str, user_state: dict, event_count: int) -> bool:
+        """Store a serialized ADK session (see TieredSessionService)."""
+        session = self.get_session(user_id)
+        try:
+            db_queries.save_session_snapshot(session, app_name, user_id, session_id, data, user_state, event_count)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            print(f"Error saving session snapshot: {e}")
+            return False
+        finally:
+            session.close()
+
+    def load_session_snapshot(self, app_name: str, user_id: str, session_id: str) -> dict | None:
+        """``{"data": session JSON, "user_state": dict}`` for a stored ADK session, or None."""
+        session = self.get_read_session(user_id, consistent=True)
+        try:
+            return db_queries.load_session_snapshot(session, app_name, user_id, session_id)
+        finally:
+            session.close()
+
+    def list_session_snapshots(self, app_name: str, user_id: str = None) -> list:
+        """JSON of every stored ADK session of user_id (of every user if None)."""
+        if user_id is not None:
+            Sessions = [self.read_Sessions[self.shard_index(user_id)]]
+        else:
+            Sessions = self.read_Sessions
+        snapshots = []
+        for Session in Sessions:
+            session = Session()
+            try:
+                snapshots += db_queries.list_session_snapshots(session, app_name, user_id)
+            finally:
+                session.close()
+        return snapshots
+
+    def delete_session_snapshot(self, app_name: str, user_id: str, session_id: str) -> bool:
+        """Forget a stored ADK session."""
+        session = self.get_session(user_id)
+        try:
+            deleted = db_queries.delete_session_snapshot(session, app_name, user_id, session_id)
+            session.commit()
+            return deleted
+        except Exception as e:
+            session.rollback()
+            print(f"Error deleting session snapshot: {e}")
+            return False
+        finally:
+            session.close()
+
+    def find_expired_guests(self, created_before: datetime, limit: int = 100) -> list:
+        """Up to ``limit`` guest user_ids created before the cutoff, oldest first per shard."""
+        guests = []
+        for Session in self.read_Sessions:
+            session = Session()
+            try:
+                guests += db_queries.find_expired_guests(session, created_before, limit - len(guests))
+            finally:
+                session.close()
+            if len(guests) >= limit:
+                break
+        return guests
+
+    def delete_users(self, user_ids: list) -> dict:
+        """Delete users with their interactions, profiles, paths and ADK sessions.
+
+        One transaction per shard; ADK's session tables (shard 0 only) are
+        cleared in shard 0's transaction, after every other shard succeeded
+        for its users. Returns the number of rows deleted per table, or {} if
+        nothing could be deleted.
+        """
+        if not user_ids:
+            return {}
+        # Queued interactions for these users would otherwise land after the delete
+        self.flush_pending_writes()
+
+        by_shard = {}
+        for user_id in user_ids:
+            by_shard.setdefault(self.shard_index(user_id), []).append(user_id)
+        by_shard.setdefault(0, [])
+
+        counts, deleted_users, session_ids = {}, [], []
+        # Shard 0 last, so it knows which users' ADK rows to remove
+        for index in sorted(by_shard, reverse=True):
+            shard_users = by_shard[index]
+            session = self.Sessions[index]()
+            try:
+                shard_session_ids = [
+                    p["session_id"] for user_id in shard_users
+                    for p in db_queries.get_learning_paths(session, user_id, include_syllabus=False)
+                ]
+                shard_counts = db_queries.delete_user_data(session, shard_users)
+                if index == 0:
+                    shard_counts.update(db_queries.delete_adk_user_data(
+                        session, deleted_users + shard_users, session_ids + shard_session_ids
+                    ))
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"Error deleting users: {e}")
+                continue
+            finally:
+                session.close()
+
+            deleted_users += shard_users
+            session_ids += shard_session_ids
+            for table, n in shard_counts.items():
+                counts[table] = counts.get(table, 0) + n
+
+        for user_id in deleted_users:
+            self.invalidate_user_caches(user_id)
+            self.bump_data_version(user_id)
+        for session_id in session_ids:
+            self.path_cache.invalidate(session_id)
+            self.session_shards.invalidate(session_id)
+            self.bump_data_version(session_id=session_id)
+        return counts if deleted_users else {}
+
+class LazyManager:
+    """Stand-in for a singleton manager that builds it on first attribute access.
+
+    Keeps importing tool modules free of database work, and follows
+    ``configure()`` since every access goes through the class.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+    def __repr__(self) -> str:
+        return f"<LazyManager for {self._factory.__name__}>"
+
+
+db_manager = LazyManager(DBManager)
@@ -0,0 +1,637 @@
+"""Session-level database operations shared by the sync and async managers.
+
+Every function takes an open SQLAlchemy ``Session`` as its first argument and
+never commits; the caller owns the transaction. ``DBManager`` calls them
+directly, ``AsyncDBManager`` runs them through ``AsyncSession.run_sync`` so the
+SQL is issued on the async driver without blocking the event loop.
+"""
+from sqlalchemy import tuple_, func, select, insert, text, bindparam, inspect, and_
+from sqlalchemy.orm import Session as SQLSession, defer
+from datetime import datetime
+import json
+
+from ai_tutor_agent.utils.models import (
+    User, Interaction, ArchivedInteraction, SessionSummary, StudentProfile, LearningPath,
+    SyllabusModule, SyllabusSubtopic, SessionSnapshot
+)
+from ai_tutor_agent.utils.text_store import store_text, load_texts, load_text, discard_text
+from ai_tutor_agent.utils import search_index
+from ai_tutor_agent.utils.syllabus import (
+    parse_syllabus, normalize_status, syllabus_hash, canonical_syllabus, unwrap_json, load_syllabus, Syllabus,
+    SYLLABUS_STATUSES
+)
+
+
+def create_user(session: SQLSession, user_id: str, name: str) -> None:
+    """Add a new user row."""
+    session.add(User(user_id=user_id, name=name))
+
+
+def get_user(session: SQLSession, user_id: str) -> dict | None:
+    """Get user by user_id."""
+    user = session.query(User).filter_by(user_id=user_id).first()
+    if user:
+        return {"user_id": user.user_id, "name": user.name}
+    return None
+
+
+def log_interaction(session: SQLSession, session_id: str, user_id: str, agent_name: str,
+                    query: str, response: str, timestamp: datetime = None) -> None:
+    """Add one interaction row, and its search index entry. ``timestamp`` defaults to insert time."""
+    timestamp = timestamp or datetime.utcnow()
+    session.add(Interaction(
+        session_id=session_id,
+        user_id=user_id,
+        agent_name=agent_name,
+        query=query,
+        response=store_text(session, response),
+        timestamp=timestamp
+    ))
+    if session.info.get("search_index"):
+        search_index.index_interaction(session, session_id, user_id, agent_name, query, response, timestamp)
+
+
+def _interaction_dicts(session: SQLSession, interactions: list) -> list:
+    responses = load_texts(session, [i.response for i in interactions])
+    return [{
+        "id": i.id,
+        "agent": i.agent_name,
+        "query": i.query,
+        "response": response if response else "Thinking...", # Handle pending
+        "timestamp": i.timestamp.isoformat()
+    } for i, response in zip(interactions, responses)]
+
+
+def _history_query(session: SQLSession, user_id: str, session_id: str = None, model=Interaction):
+    query = session.query(model).filter_by(user_id=user_id)
+    if session_id:
+        query = query.filter_by(session_id=session_id)
+    # (timestamp, id) matches ix_interactions_user_session_ts, whose implicit
+    # trailing rowid makes the order total and the scan sort-free.
+    return query.order_by(model.timestamp.desc(), model.id.desc())
+
+
+def _history_rows(session: SQLSession, user_id: str, session_id: str,
+                  before_id: int | None, limit: int, before_time: datetime = None) -> list | None:
+    """Up to ``limit`` rows older than ``before_id`` (or ``before_time``), newest first.
+
+    Archived rows are all older than hot ones, so the archive is only read
+    once the hot table runs out. Returns None if ``before_id`` doesn't exist.
+    """
+    anchor = None
+    if before_id is None and before_time is not None:
+        # (timestamp, id) < (before_time, 0) is timestamp < before_time
+        anchor, before_id = before_time, 0
+    elif before_id is not None:
+        anchor = session.query(Interaction.timestamp).filter_by(id=before_id).scalar()
+        if anchor is None:
+            anchor = session.query(ArchivedInteraction.timestamp).filter_by(id=before_id).scalar()
+        if anchor is None:
+            return None
+
+    rows = []
+    for model in (Interaction, ArchivedInteraction):
+        query = _history_query(session, user_id, session_id, model)
+        if anchor is not None:
+            query = query.filter(tuple_(model.timestamp, model.id) < tuple_(anchor, before_id))
+        rows += query.limit(limit - len(rows)).all()
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def get_chat_history(session: SQLSession, user_id: str, session_id: str = None, limit: int = 20) -> list:
+    """Get recent chat history for a user, optionally filtered by session."""
+    interactions = _history_rows(session, user_id, session_id, None, limit)
+
+    # Return reversed to show chronological order
+    return _interaction_dicts(session, list(reversed(interactions)))
+
+
+def get_chat_history_page(session: SQLSession, user_id: str, session_id: str = None,
+                          before_id: int = None, limit: int = 20, before_time: datetime = None) -> dict:
+    """Get one page of history older than ``before_id`` (newest page if None).
+
+    Keyset pagination on (timestamp, id): each page is an index range scan of
+    ``limit`` rows no matter how deep into the conversation it is. Pages past
+    the hot window are read from the archive. ``before_time`` anchors the
+    first page at a moment instead of a row, e.g. the oldest message a
+    client still shows.
+    """
+    rows = _history_rows(session, user_id, session_id, before_id, limit + 1, before_time)
+    if rows is None:
+        return {"messages": [], "has_more": False, "next_before_id": None}
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "messages": _interaction_dicts(session, list(reversed(rows))),
+        "has_more": has_more,
+        "next_before_id": rows[-1].id if has_more else None,
+    }
+
+
+def archive_interactions(session: SQLSession, older_than: datetime, limit: int) -> dict:
+    """Move up to ``limit`` of the oldest interactions before ``older_than`` to the archive.
+
+    Returns the rows and sessions archived, and the (user_id, session_id)
+    pairs ``touched``.
+
+    Each affected session's ``SessionSummary`` row is updated in the same
+    transaction. Archived rows keep their ids, which ``interactions``
+    (AUTOINCREMENT) never hands out again.
+    """
+    ids = [r.id for r in session.query(Interaction.id).filter(
+        Interaction.timestamp < older_than
+    ).order_by(Interaction.timestamp, Interaction.id).limit(limit)]
+    if not ids:
+        return {"archived": 0, "sessions": 0, "touched": []}
+
+    columns = ("id", "session_id", "user_id", "agent_name", "query", "response", "timestamp")
+    session.execute(insert(ArchivedInteraction).from_select(
+        columns, select(*(getattr(Interaction, c) for c in columns)).where(Interaction.id.in_(ids))
+    ))
+
+    groups = session.query(
+        Interaction.user_id, Interaction.session_id, Interaction.agent_name,
+        func.count(Interaction.id), func.min(Interaction.timestamp), func.max(Interaction.timestamp)
+    ).filter(Interaction.id.in_(ids)).group_by(
+        Interaction.user_id, Interaction.session_id, Interaction.agent_name
+    ).all()
+
+    keys = {(g[0], g[1]) for g in groups}
+    summaries = {
+        (s.user_id, s.session_id): s
+        for s in session.query(SessionSummary).filter(
+            tuple_(SessionSummary.user_id, SessionSummary.session_id).in_(keys)
+        )
+    }
+    for user_id, session_id, agent_name, count, first_at, last_at in groups:
+        summary = summaries.get((user_id, session_id))
+        if summary is None:
+            summary = SessionSummary(user_id=user_id, session_id=session_id, archived_count=0, agents="[]")
+            summaries[(user_id, session_id)] = summary
+            session.add(summary)
+        summary.archived_count += count
+        summary.first_at = min(filter(None, (summary.first_at, first_at)), default=None)
+        summary.last_archived_at = max(filter(None, (summary.last_archived_at, last_at)), default=None)
+        agents = json.loads(summary.agents or "[]")
+        if agent_name and agent_name not in agents:
+            summary.agents = json.dumps(agents + [agent_name])
+
+    session.query(Interaction).filter(Interaction.id.in_(ids)).delete(synchronize_session=False)
+    return {"archived": len(ids), "sessions": len(keys), "touched": sorted(keys)}
+
+
+def search_history(session: SQLSession, user_id: str, search_text: str, limit: int = 10) -> list:
+    """Ranked full-text matches from a user's hot and archived interactions."""
+    if not session.info.get("search_index"):
+        return []
+    return search_index.search(session, user_id, search_text, limit)
+
+
+def get_session_summary(session: SQLSession, user_id: str, session_id: str) -> dict:
+    """Message counts and time span of a chat session across hot and archived rows."""
+    hot_count, hot_first, hot_last = session.query(
+        func.count(Interaction.id), func.min(Interaction.timestamp), func.max(Interaction.timestamp)
+    ).filter_by(user_id=user_id, session_id=session_id).one()
+    summary = session.get(SessionSummary, (user_id, session_id))
+
+    first_at = summary.first_at if summary and summary.first_at else hot_first
+    last_at = hot_last or (summary.last_archived_at if summary else None)
+    return {
+        "session_id": session_id,
+        "message_count": hot_count + (summary.archived_count if summary else 0),
+        "archived_count": summary.archived_count if summary else 0,
+        "first_at": first_at.isoformat() if first_at else None,
+        "last_at": last_at.isoformat() if last_at else None,
+        "agents": json.loads(summary.agents) if summary else [],
+    }
+
+
+def update_student_profile(session: SQLSession, user_id: str, subject: str, level: str, details: str = "{}") -> None:
+    """Update or create a student profile for a subject."""
+    profile = session.query(StudentProfile).filter_by(
+        user_id=user_id, subject=subject
+    ).first()
+
+    # Free-form JSON: only undo double encoding, never reshape it
+    details = unwrap_json(details)
+    if profile:
+        profile.level = level
+        profile.details = store_text(session, details)
+    else:
+        session.add(StudentProfile(
+            user_id=user_id,
+            subject=subject,
+            level=level,
+            details=store_text(session, details)
+        ))
+
+
+def get_student_profile(session: SQLSession, user_id: str, subject: str = None) -> list | dict | None:
+    """Get student profile(s). If subject is None, returns all subjects."""
+    if subject:
+        profile = session.query(StudentProfile).filter_by(
+            user_id=user_id, subject=subject
+        ).first()
+        return {
+            "subject": profile.subject,
+            "level": profile.level,
+            "details": load_text(session, profile.details)
+        } if profile else None
+
+    profiles = session.query(StudentProfile).filter_by(user_id=user_id).all()
+    details = load_texts(session, [p.details for p in profiles])
+    return [{
+        "subject": p.subject,
+        "level": p.level,
+        "details": d
+    } for p, d in zip(profiles, details)]
+
+
+def create_learning_path(session: SQLSession, user_id: str, session_id: str, subject: str, title: str) -> None:
+    """Add a new learning path row."""
+    session.add(LearningPath(
+        user_id=user_id,
+        session_id=session_id,
+        subject=subject.lower(), # Normalize
+        title=title
+    ))
+
+
+def _replace_syllabus_rows(session: SQLSession, path: LearningPath, syllabus: Syllabus) -> None:
+    """Rewrite the normalized module/subtopic rows of a path from its parsed JSON."""
+    module_ids = select(SyllabusModule.id).where(SyllabusModule.path_id == path.id)
+    session.query(SyllabusSubtopic).filter(SyllabusSubtopic.module_id.in_(module_ids)).delete(synchronize_session=False)
+    session.query(SyllabusModule).filter_by(path_id=path.id).delete(synchronize_session=False)
+
+    for position, item in enumerate(syllabus.modules):
+        session.add(SyllabusModule(
+            path_id=path.id,
+            position=position,
+            name=item.module,
+            status=item.status,
+            subtopics=[
+                SyllabusSubtopic(position=i, name=name)
+                for i, name in enumerate(item.subtopics)
+            ]
+        ))
+
+
+def _compose_syllabus(raw: str, modules: list, current_topic: str = None) -> str:
+    """Overlay the normalized rows (authoritative for modules and status) on the JSON blob."""
+    if not modules and current_topic is None:
+        return raw
+
+    data = parse_syllabus(raw) or {}
+    if current_topic is not None:
+        data["current_topic"] = current_topic
+    if not modules:
+        return json.dumps(data)
+
+    blob_modules = data.get("syllabus") if isinstance(data.get("syllabus"), list) else []
+    composed = []
+    for m in modules:
+        # Keep any extra keys the agent stored on the module
+        extra = blob_modules[m.position] if m.position < len(blob_modules) else {}
+        item = dict(extra) if isinstance(extra, dict) else {}
+        item.update({
+            "module": m.name,
+            "status": m.status,
+            "subtopics": [sub.name for sub in m.subtopics]
+        })
+        composed.append(item)
+    data["syllabus"] = composed
+    return json.dumps(data)
+
+
+def _load_modules(session: SQLSession, path_ids: list) -> dict:
+    """Fetch modules (with subtopics) for several paths in one round trip."""
+    if not path_ids:
+        return {}
+    modules = session.query(SyllabusModule).filter(
+        SyllabusModule.path_id.in_(path_ids)
+    ).order_by(SyllabusModule.path_id, SyllabusModule.position).all()
+    by_path = {}
+    for m in modules:
+        by_path.setdefault(m.path_id, []).append(m)
+    return by_path
+
+
+def update_learning_path_details(session: SQLSession, session_id: str, syllabus: str) -> bool:
+    """Set the syllabus of a learning path. Returns False if the path does not exist."""
+    path = session.query(LearningPath).filter_by(session_id=session_id).first()
+    if not path:
+        return False
+    # Parsed once here; readers of the same text get it from load_syllabus()'s cache
+    syllabus = canonical_syllabus(syllabus)
+    path.syllabus = store_text(session, syllabus)
+    # A full document carries its own current_topic
+    path.current_topic = None
+    _replace_syllabus_rows(session, path, load_syllabus(syllabus))
+    return True
+
+
+def set_module_status(session: SQLSession, session_id: str, module: str, status: str) -> bool:
+    """Flip the status of one syllabus module (matched case-insensitively by name)."""
+    path_id = select(LearningPath.id).where(LearningPath.session_id == session_id).scalar_subquery()
+    updated = session.query(SyllabusModule).filter(
+        SyllabusModule.path_id == path_id,
+        func.lower(SyllabusModule.name) == module.strip().lower()
+    ).update({SyllabusModule.status: normalize_status(status)}, synchronize_session=False)
+    return updated > 0
+
+
+def apply_syllabus_patch(session: SQLSession, session_id: str, module_status: dict | None = None,
+                         current_topic: str | None = None) -> dict:
+    """Apply module status flips and/or a current_topic change; see DBManager.apply_syllabus_patch."""
+    path = session.query(LearningPath).filter_by(session_id=session_id).first()
+    if not path:
+        return {"success": False, "syllabus_hash": None, "unknown_modules": [], "error": "No learning path for this session"}
+
+    unknown = [
+        module for module, status in (module_status or {}).items()
+        if not set_module_status(session, session_id, module, status)
+    ]
+    if current_topic is not None:
+        path.current_topic = current_topic
+    session.flush()
+
+    modules = _load_modules(session, [path.id]).get(path.id)
+    document = _compose_syllabus(load_text(session, path.syllabus), modules, path.current_topic)
+    return {"success": True, "syllabus_hash": syllabus_hash(document), "unknown_modules": unknown}
+
+
+def get_syllabus_progress(session: SQLSession, session_id: str) -> dict:
+    """Count modules per status for a path via the (path_id, status) index."""
+    counts = dict(
+        session.query(SyllabusModule.status, func.count())
+        .join(LearningPath, LearningPath.id == SyllabusModule.path_id)
+        .filter(LearningPath.session_id == session_id)
+        .group_by(SyllabusModule.status)
+        .all()
+    )
+    progress = {status: counts.get(status, 0) for status in SYLLABUS_STATUSES}
+    progress["total"] = sum(counts.values())
+    progress["percent"] = progress["completed"] / progress["total"] if progress["total"] else 0.0
+    return progress
+
+
+def backfill_syllabus_rows(session: SQLSession) -> int:
+    """Create normalized rows for paths that only have the JSON blob. Returns paths filled."""
+    has_rows = select(SyllabusModule.id).where(SyllabusModule.path_id == LearningPath.id).exists()
+    paths = session.query(LearningPath).filter(
+        LearningPath.syllabus.isnot(None),
+        LearningPath.syllabus != '{}',
+        ~has_rows
+    ).all()
+    for path, syllabus in zip(paths, load_texts(session, [p.syllabus for p in paths])):
+        _replace_syllabus_rows(session, path, load_syllabus(syllabus))
+    return len(paths)
+
+
+def repair_syllabus_encoding(session: SQLSession, batch_size: int = 500) -> int:
+    """Rewrite path syllabi and profile details stored as JSON-encoded JSON strings.
+
+    Returns rows repaired. Replaced blobs are left to gc_text_blobs(), since
+    other rows may share them.
+    """
+    repaired = 0
+    for model, column, canonical in ((LearningPath, "syllabus", canonical_syllabus),
+                                     (StudentProfile, "details", unwrap_json)):
+        last_id = 0
+        while True:
+            rows = session.query(model).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row, raw in zip(rows, load_texts(session, [getattr(r, column) for r in rows])):
+                try:
+                    encoded_twice = isinstance(json.loads(raw), str)
+                except (TypeError, ValueError):
+                    continue
+                fixed = canonical(raw) if encoded_twice else raw
+                if fixed != raw:
+                    setattr(row, column, store_text(session, fixed))
+                    repaired += 1
+            last_id = rows[-1].id
+            session.flush()
+    return repaired
+
+
+def _path_dict(p: LearningPath, include_syllabus: bool = True, modules: list = None,
+               syllabus: str = None) -> dict:
+    """``syllabus`` is the decoded p.syllabus; required when include_syllabus."""
+    path = {
+        "id": p.id,
+        "session_id": p.session_id,
+        "subject": p.subject,
+        "title": p.title,
+        "created_at": p.created_at.isoformat()
+    }
+    if include_syllabus:
+        path["syllabus"] = _compose_syllabus(syllabus, modules, p.current_topic)
+    return path
+
+
+def get_learning_paths(session: SQLSession, user_id: str, include_syllabus: bool = True) -> list:
+    """Get all learning paths for a user, newest first."""
+    if include_syllabus:
+        query = session.query(LearningPath)
+    else:
+        # Don't even read the syllabus blobs off disk for list views
+        query = session.query(LearningPath).options(defer(LearningPath.syllabus))
+    paths = query.filter_by(user_id=user_id).order_by(LearningPath.created_at.desc()).all()
+    if not include_syllabus:
+        return [_path_dict(p, include_syllabus=False) for p in paths]
+    modules = _load_modules(session, [p.id for p in paths])
+    syllabi = load_texts(session, [p.syllabus for p in paths])
+    return [_path_dict(p, True, modules.get(p.id), syllabus) for p, syllabus in zip(paths, syllabi)]
+
+
+def get_path_owner(session: SQLSession, session_id: str) -> str | None:
+    """user_id of the learning path bound to session_id, if this database has it."""
+    return session.query(LearningPath.user_id).filter_by(session_id=session_id).scalar()
+
+
+def table_counts(session: SQLSession) -> dict:
+    """Row counts of the main tables, for admin views."""
+    return {
+        "users": session.query(func.count(User.user_id)).scalar(),
+        "interactions": session.query(func.count(Interaction.id)).scalar(),
+        "archived_interactions": session.query(func.count(ArchivedInteraction.id)).scalar(),
+        "learning_paths": session.query(func.count(LearningPath.id)).scalar(),
+    }
+
+
+def get_learning_path_by_session(session: SQLSession, session_id: str) -> dict | None:
+    """Get the learning path bound to a chat session (unique index lookup)."""
+    p = session.query(LearningPath).filter_by(session_id=session_id).first()
+    if not p:
+        return None
+    path = _path_dict(p, modules=_load_modules(session, [p.id]).get(p.id), syllabus=load_text(session, p.syllabus))
+    path["user_id"] = p.user_id
+    return path
+
+
+def get_dashboard(session: SQLSession, user_id: str, session_id: str, history_limit: int = 0) -> dict:
+    """Paths, active path, its syllabus, progress and profile, plus a first history page.
+
+    One outer join brings every path with its subject's profile; only the
+    active path's text and modules are decoded. ``history_limit=0`` skips
+    the history page.
+    """
+    rows = session.query(LearningPath, StudentProfile).outerjoin(StudentProfile, and_(
+        StudentProfile.user_id == LearningPath.user_id, StudentProfile.subject == LearningPath.subject
+    )).filter(LearningPath.user_id == user_id).order_by(LearningPath.created_at.desc()).all()
+
+    dashboard = {
+        "paths": [_path_dict(p, include_syllabus=False) for p, _ in rows],
+        "current_path": None,
+        "syllabus": None,
+        "modules": [],
+        "progress": None,
+        "profile": None,
+        "history": None,
+    }
+    active = next(((p, profile) for p, profile in rows if p.session_id == session_id), None)
+    if active is not None:
+        path, profile = active
+        syllabus_text, details = load_texts(session, [path.syllabus, profile.details if profile else None])
+        rows_by_path = _load_modules(session, [path.id])
+        if rows_by_path:
+            syllabus = Syllabus.from_rows(rows_by_path[path.id], path.current_topic)
+        else:
+            # No normalized rows yet: the path's JSON, or the legacy profile details
+            syllabus = load_syllabus(syllabus_text)
+            if not syllabus.modules:
+                syllabus = load_syllabus(details)
+        if syllabus.current_topic is None:
+            syllabus = syllabus._replace(current_topic=load_syllabus(syllabus_text).current_topic)
+        dashboard["current_path"] = dict(_path_dict(path, include_syllabus=False),
+                                         current_topic=syllabus.current_topic)
+        dashboard["syllabus"] = syllabus
+        dashboard["modules"] = syllabus.module_dicts()
+        dashboard["progress"] = syllabus.progress()
+        if profile is not None:
+            dashboard["profile"] = {"subject": profile.subject, "level": profile.level}
+
+    if history_limit:
+        dashboard["history"] = get_chat_history_page(session, user_id, session_id, None, history_limit)
+    return dashboard
+
+
+# ADK session tables that live in the same database when DatabaseSessionService
+# is used. Sessions are keyed by the user, or by a learning path's session id.
+_ADK_USER_DELETES = {
+    "events": "DELETE FROM events WHERE user_id IN :user_ids OR session_id IN :session_ids",
+    "sessions": "DELETE FROM sessions WHERE user_id IN :user_ids OR id IN :session_ids",
+    "user_states": "DELETE FROM user_states WHERE user_id IN :user_ids",
+    "session_compactions": "DELETE FROM session_compactions WHERE user_id IN :user_ids OR session_id IN :session_ids",
+}
+
+
+def find_expired_guests(session: SQLSession, created_before: datetime, limit: int) -> list:
+    """Oldest guest user_ids created before the cutoff."""
+    rows = session.query(User.user_id).filter(
+        User.user_id.like("guest\\_%", escape="\\"),
+        User.created_at < created_before
+    ).order_by(User.created_at).limit(limit).all()
+    return [r.user_id for r in rows]
+
+
+def save_session_snapshot(session: SQLSession, app_name: str, user_id: str, session_id: str,
+                          data: str, user_state: dict, event_count: int) -> None:
+    """Insert or replace the stored copy of one ADK session."""
+    # Before add(): store_text() queries, which would autoflush a row without data
+    stored = store_text(session, data)
+    row = session.get(SessionSnapshot, (app_name, user_id, session_id))
+    if row is None:
+        row = SessionSnapshot(app_name=app_name, user_id=user_id, session_id=session_id)
+        session.add(row)
+    elif row.data != stored:
+        # The JSON embeds this row's key, so its blob is never shared
+        discard_text(session, row.data)
+    row.data = stored
+    row.user_state = json.dumps(user_state)
+    row.event_count = event_count
+    row.updated_at = datetime.utcnow()
+
+
+def load_session_snapshot(session: SQLSession, app_name: str, user_id: str, session_id: str) -> dict | None:
+    """Stored session JSON plus the user's latest saved 'user:' state, or None."""
+    row = session.get(SessionSnapshot, (app_name, user_id, session_id))
+    if row is None:
+        return None
+    # Every snapshot carries the user state as of its save; the newest wins
+    latest = session.query(SessionSnapshot.user_state).filter_by(
+        app_name=app_name, user_id=user_id
+    ).order_by(SessionSnapshot.updated_at.desc()).first()
+    return {
+        "data": load_text(session, row.data),
+        "user_state": json.loads(latest.user_state or "{}"),
+    }
+
+
+def list_session_snapshots(session: SQLSession, app_name: str, user_id: str = None) -> list:
+    """Stored session JSON for every saved session of a user (or of the app)."""
+    query = session.query(SessionSnapshot.data).filter_by(app_name=app_name)
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    return load_texts(session, [r.data for r in query])
+
+
+def delete_session_snapshot(session: SQLSession, app_name: str, user_id: str, session_id: str) -> bool:
+    return session.query(SessionSnapshot).filter_by(
+        app_name=app_name, user_id=user_id, session_id=session_id
+    ).delete(synchronize_session=False) > 0
+
+
+def delete_user_data(session: SQLSession, user_ids: list) -> dict:
+    """Delete users and every app row that belongs to them. Returns rows deleted per table.
+
+    ADK's session tables are cleared separately by delete_adk_user_data().
+    """
+    if not user_ids:
+        return {}
+
+    path_ids = [r.id for r in session.query(LearningPath.id).filter(
+        LearningPath.user_id.in_(user_ids)
+    )]
+    module_ids = select(SyllabusModule.id).where(SyllabusModule.path_id.in_(path_ids))
+
+    counts = {
+        "interactions": session.query(Interaction).filter(Interaction.user_id.in_(user_ids)).delete(synchronize_session=False),
+        "interactions_archive": session.query(ArchivedInteraction).filter(ArchivedInteraction.user_id.in_(user_ids)).delete(synchronize_session=False),
+        "session_summaries": session.query(SessionSummary).filter(SessionSummary.user_id.in_(user_ids)).delete(synchronize_session=False),
+        "syllabus_subtopics": session.query(SyllabusSubtopic).filter(SyllabusSubtopic.module_id.in_(module_ids)).delete(synchronize_session=False),
+        "syllabus_modules": session.query(SyllabusModule).filter(SyllabusModule.path_id.in_(path_ids)).delete(synchronize_session=False),
+        "learning_paths": session.query(LearningPath).filter(LearningPath.id.in_(path_ids)).delete(synchronize_session=False),
+        "student_profiles": session.query(StudentProfile).filter(StudentProfile.user_id.in_(user_ids)).delete(synchronize_session=False),
+        "adk_session_snapshots": session.query(SessionSnapshot).filter(SessionSnapshot.user_id.in_(user_ids)).delete(synchronize_session=False),
+        "users": session.query(User).filter(User.user_id.in_(user_ids)).delete(synchronize_session=False),
+    }
+
+    if session.info.get("search_index"):
+        counts[search_index.FTS_TABLE] = search_index.delete_users(session, user_ids)
+
+    return counts
+
+
+def delete_adk_user_data(session: SQLSession, user_ids: list, session_ids: list) -> dict:
+    """Delete ADK sessions, events and user state of the given users and path sessions."""
+    if not user_ids:
+        return {}
+    counts = {}
+    existing = set(inspect(session.connection()).get_table_names())
+    for table, sql in _ADK_USER_DELETES.items():
+        if table not in existing:
+            continue
+        stmt = text(sql).bindparams(*(
+            bindparam(name, expanding=True) for name in ("user_ids", "session_ids") if f":{name}" in sql
+        ))
+        params = {"user_ids": user_ids}
+        if ":session_ids" in sql:
+            params["session_ids"] = session_ids or [""]
+        counts[f"adk_{table}"] = session.execute(stmt, params).rowcount
+    return counts
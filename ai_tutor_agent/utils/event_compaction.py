@@ -0,0 +1,146 @@
+"""Compaction of ADK's ``events`` table for DatabaseSessionService sessions.
+
+A long session's old events are replaced by one compaction event: an
+``EventActions.compaction`` carrying a rolling text summary, which ADK's
+contents builder puts in the model context in place of the compacted turns.
+The event also records the session state at that point. ``session_compactions``
+remembers where the newest summary sits so loaders can start from it (see
+``CompactingSessionService``).
+
+The summary is extractive (who said what, truncated) and needs no model call;
+each compaction folds the previous summary in and keeps the most recent text.
+"""
+from sqlalchemy import func, inspect
+from sqlalchemy.orm import Session as SQLSession
+from datetime import datetime
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions, EventCompaction
+from google.adk.sessions.database_session_service import StorageEvent, StorageSession
+from google.adk.sessions.session import Session
+from google.genai import types
+
+from ai_tutor_agent.utils.models import SessionCompaction
+
+SUMMARY_HEADER = "Summary of the earlier conversation in this session:"
+
+
+def find_sessions_to_compact(session: SQLSession, min_events: int, limit: int) -> list:
+    """Up to ``limit`` (app_name, user_id, session_id) keys with more than min_events events."""
+    if not inspect(session.connection()).has_table("events"):
+        return []
+    rows = session.query(
+        StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id
+    ).group_by(
+        StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id
+    ).having(func.count() > min_events).limit(limit).all()
+    return [tuple(r) for r in rows]
+
+
+def restore_compaction(event: Event) -> Event:
+    """Re-validate ``actions.compaction`` on an event read from the database.
+
+    StorageEvent.to_event() rebuilds actions with model_copy(update=...),
+    which skips validation and leaves the compaction as a plain dict that
+    ADK's contents builder can't read.
+    """
+    if event.actions and isinstance(event.actions.compaction, dict):
+        event.actions.compaction = EventCompaction.model_validate(event.actions.compaction)
+    return event
+
+
+def _event_text(event: Event) -> str:
+    if event.actions and event.actions.compaction:
+        content = event.actions.compaction.compacted_content
+    else:
+        content = event.content
+    if not content or not content.parts:
+        return ""
+    return " ".join(p.text.strip() for p in content.parts if p.text and not p.thought).strip()
+
+
+def summarize_events(events: list, max_chars: int, line_chars: int = 300) -> str:
+    """Fold events (oldest first) into one summary of at most ``max_chars``."""
+    lines = []
+    for event in events:
+        body = _event_text(event)
+        if not body:
+            continue
+        if event.actions and event.actions.compaction:
+            # An earlier summary: carry its lines over without the header
+            lines += [l for l in body.splitlines() if l and l != SUMMARY_HEADER]
+            continue
+        if len(body) > line_chars:
+            body = body[:line_chars].rstrip() + "…"
+        lines.append(f"- {event.author}: {' '.join(body.split())}")
+
+    # Keep the most recent lines that fit
+    kept, size = [], len(SUMMARY_HEADER)
+    for line in reversed(lines):
+        size += len(line) + 1
+        if size > max_chars:
+            break
+        kept.append(line)
+    return "\n".join([SUMMARY_HEADER] + kept[::-1])
+
+
+def compact_session(session: SQLSession, app_name: str, user_id: str, session_id: str,
+                    keep_events: int, max_summary_chars: int) -> int:
+    """Replace all but the last ``keep_events`` events with a compaction event.
+
+    The cut never splits an invocation, so tool calls stay paired with their
+    responses. Returns the number of events removed (0 if there was nothing
+    to compact).
+    """
+    key = (StorageEvent.app_name == app_name, StorageEvent.user_id == user_id,
+           StorageEvent.session_id == session_id)
+    boundary = session.query(StorageEvent.invocation_id).filter(*key).order_by(
+        StorageEvent.timestamp.desc()
+    ).offset(keep_events - 1).limit(1).scalar()
+    if boundary is None:
+        return 0
+    keep_from = session.query(func.min(StorageEvent.timestamp)).filter(
+        *key, StorageEvent.invocation_id == boundary
+    ).scalar()
+    old = session.query(StorageEvent).filter(*key, StorageEvent.timestamp < keep_from).order_by(
+        StorageEvent.timestamp
+    ).all()
+    if len(old) < 2:
+        return 0  # Replacing one event with one event gains nothing
+
+    events = [restore_compaction(e.to_event()) for e in old]
+    storage_session = session.get(StorageSession, (app_name, user_id, session_id))
+    summary = Event(
+        author="user",
+        invocation_id=Event.new_id(),
+        # Sorts after every compacted event and before every kept one
+        timestamp=events[-1].timestamp,
+        actions=EventActions(compaction=EventCompaction(
+            start_timestamp=events[0].timestamp,
+            end_timestamp=events[-1].timestamp,
+            compacted_content=types.Content(
+                role="model", parts=[types.Part(text=summarize_events(events, max_summary_chars))]
+            ),
+        )),
+        custom_metadata={
+            "state_snapshot": dict(storage_session.state) if storage_session else {},
+            "compacted_events": len(old),
+        },
+    )
+
+    for row in old:
+        session.delete(row)
+    session.flush()
+    session.add(StorageEvent.from_event(Session(app_name=app_name, user_id=user_id, id=session_id), summary))
+
+    record = session.get(SessionCompaction, (app_name, user_id, session_id))
+    if record is None:
+        record = SessionCompaction(app_name=app_name, user_id=user_id, session_id=session_id,
+                                   events_compacted=0, compactions=0)
+        session.add(record)
+    record.summary_event_id = summary.id
+    record.summary_timestamp = summary.timestamp
+    record.events_compacted += len(old)
+    record.compactions += 1
+    record.updated_at = datetime.utcnow()
+    return len(old)
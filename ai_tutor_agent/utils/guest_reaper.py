@@ -0,0 +1,105 @@
+"""Background cleanup of expired guest accounts."""
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+
+from ai_tutor_agent.utils.db_manager import DBManager
+
+
+class GuestReaper:
+    """Deletes ``guest_*`` users older than a TTL, in bounded batches.
+
+    Each batch is one transaction covering the users, their interactions,
+    profiles, learning paths (with syllabus rows) and ADK session tables, so
+    the writer lock is never held for more than ``batch_size`` users at a time.
+    """
+
+    def __init__(self, manager: DBManager = None, ttl_hours: float = None,
+                 batch_size: int = None, interval_seconds: float = None):
+        self.manager = manager or DBManager()
+        self.ttl = timedelta(hours=ttl_hours if ttl_hours is not None else float(os.getenv("GUEST_TTL_HOURS", "24")))
+        self.batch_size = batch_size or int(os.getenv("GUEST_REAPER_BATCH_SIZE", "100"))
+        self.interval_seconds = interval_seconds or float(os.getenv("GUEST_REAPER_INTERVAL_SECONDS", "3600"))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "users_deleted": 0,
+            "rows_deleted": {},
+            "last_run_at": None,
+            "last_run_ms": 0.0,
+            "last_users_per_second": 0.0,
+        }
+
+    def delete_guests(self, user_ids: list) -> dict:
+        """Delete specific guest users right away. Non-guest IDs are ignored."""
+        guests = [u for u in user_ids if u.startswith("guest_")]
+        counts = self.manager.delete_users(guests)
+        self._record(len(guests) if counts else 0, counts)
+        return counts
+
+    def reap_expired(self) -> dict:
+        """Delete every expired guest, batch by batch. Returns this run's totals."""
+        started = time.perf_counter()
+        cutoff = datetime.utcnow() - self.ttl
+        users, rows = 0, {}
+
+        while not self._stop.is_set():
+            batch = self.manager.find_expired_guests(cutoff, self.batch_size)
+            if not batch:
+                break
+            counts = self.manager.delete_users(batch)
+            if not counts:
+                break  # delete failed; retry on the next run
+            users += len(batch)
+            for table, n in counts.items():
+                rows[table] = rows.get(table, 0) + n
+            if len(batch) < self.batch_size:
+                break
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["last_run_at"] = datetime.utcnow().isoformat()
+            self._stats["last_run_ms"] = elapsed * 1000
+            self._stats["last_users_per_second"] = users / elapsed if elapsed > 0 else 0.0
+        self._record(users, rows)
+
+        if users:
+            print(f"🗑️  Reaped {users} expired guest(s), {sum(rows.values())} rows in {elapsed * 1000:.0f} ms")
+        return {"users_deleted": users, "rows_deleted": rows, "elapsed_ms": elapsed * 1000}
+
+    def start(self) -> None:
+        """Run reap_expired() every interval_seconds on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="guest-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["rows_deleted"] = dict(stats["rows_deleted"])
+        return stats
+
+    def _record(self, users: int, rows: dict) -> None:
+        with self._lock:
+            self._stats["users_deleted"] += users
+            for table, n in rows.items():
+                self._stats["rows_deleted"][table] = self._stats["rows_deleted"].get(table, 0) + n
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.reap_expired()
+            except Exception as e:
+                print(f"⚠️ Guest reaper run failed: {e}")
+            self._stop.wait(self.interval_seconds)
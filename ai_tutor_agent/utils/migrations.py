@@ -0,0 +1,284 @@
+"""Versioned schema migrations.
+
+Each step has a number and runs once per database; the highest applied
+number is kept in ``schema_migrations``. At boot an up-to-date database
+costs a single ``MAX(version)`` read on that table's primary key.
+
+To add a migration, append a ``Migration`` with the next version number.
+Steps must be idempotent: a database that predates the registry runs every
+step once, whatever state it is actually in.
+"""
+from sqlalchemy import Engine, Connection, inspect, text, select, func, insert
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.orm import Session as SQLSession
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple
+import logging
+import time
+
+from ai_tutor_agent.utils.models import (
+    Base, User, Interaction, ArchivedInteraction, SessionSummary, SyllabusModule, SyllabusSubtopic,
+    TextBlob, SessionSnapshot, SessionCompaction, SchemaMigration
+)
+from ai_tutor_agent.utils import db_queries, search_index
+from ai_tutor_agent.utils.text_store import load_texts
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # Also run on brand-new databases, for objects create_all() doesn't know about
+    on_fresh: bool = False
+
+
+def _add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    def step(conn: Connection) -> None:
+        if not inspect(conn).has_table(table):
+            return
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def _create_tables(*models) -> Callable[[Connection], None]:
+    def step(conn: Connection) -> None:
+        for model in models:
+            model.__table__.create(bind=conn, checkfirst=True)
+    return step
+
+
+def _create_index(model, name: str) -> Callable[[Connection], None]:
+    def step(conn: Connection) -> None:
+        index = next(i for i in model.__table__.indexes if i.name == name)
+        index.create(bind=conn, checkfirst=True)
+    return step
+
+
+def _events_transcription_columns(conn: Connection) -> None:
+    # 'events' belongs to ADK's DatabaseSessionService; older ADK versions
+    # created it without the transcription columns.
+    _add_column("events", "input_transcription", "TEXT")(conn)
+    _add_column("events", "output_transcription", "TEXT")(conn)
+
+
+def ensure_events_index(conn: Connection) -> None:
+    """Index ADK's events table by session, if it exists.
+
+    Its primary key starts with the event id, so without this every
+    per-session load scans the whole table. Databases where ADK creates
+    'events' after migrating get it from CompactingSessionService.
+    """
+    if inspect(conn).has_table("events"):
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_events_session_ts ON events (app_name, user_id, session_id, timestamp)"
+        ))
+
+
+def _session_compaction_tables(conn: Connection) -> None:
+    _create_tables(SessionCompaction)(conn)
+    ensure_events_index(conn)
+
+
+def _backfill_syllabus_rows(conn: Connection) -> None:
+    session = SQLSession(bind=conn)
+    filled = db_queries.backfill_syllabus_rows(session)
+    session.flush()
+    session.close()
+    if filled:
+        print(f"🔧 Migrating DB: Normalized syllabus for {filled} learning path(s)")
+
+
+def _repair_syllabus_encoding(conn: Connection) -> None:
+    session = SQLSession(bind=conn)
+    repaired = db_queries.repair_syllabus_encoding(session)
+    session.flush()
+    session.close()
+    if repaired:
+        print(f"🔧 Migrating DB: Re-encoded {repaired} double-encoded syllabus document(s)")
+
+
+def _interactions_autoincrement(conn: Connection) -> None:
+    # Without AUTOINCREMENT SQLite assigns max(id) + 1, which reuses the ids
+    # of archived rows once the newest hot ones are archived or deleted.
+    # SQLite can't alter a primary key, so the table is rebuilt.
+    if conn.dialect.name != "sqlite":
+        return
+    if inspect(conn).has_table("interactions_old"):
+        # Left by a rebuild that ran outside a transaction and failed part way;
+        # interactions_old is the complete original, so start over from it
+        conn.execute(text("DROP TABLE IF EXISTS interactions"))
+        conn.execute(text("ALTER TABLE interactions_old RENAME TO interactions"))
+    if not inspect(conn).has_table("interactions"):
+        return
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'interactions'")).scalar()
+    if "AUTOINCREMENT" not in ddl.upper():
+        table = Interaction.__table__
+        columns = ", ".join(c.name for c in table.columns)
+        conn.execute(text("ALTER TABLE interactions RENAME TO interactions_old"))
+        # Indexes moved with the table and would clash with the new ones
+        for index in inspect(conn).get_indexes("interactions_old"):
+            conn.execute(text(f"DROP INDEX {index['name']}"))
+        table.create(bind=conn)
+        conn.execute(text(f"INSERT INTO interactions ({columns}) SELECT {columns} FROM interactions_old"))
+        conn.execute(text("DROP TABLE interactions_old"))
+
+    # Start above every id handed out so far, archived ones included
+    highest = conn.execute(text(
+        "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM interactions UNION ALL "
+        "SELECT MAX(id) FROM interactions_archive)"
+    )).scalar() if inspect(conn).has_table("interactions_archive") else None
+    if highest:
+        updated = conn.execute(text(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, :highest) WHERE name = 'interactions'"
+        ), {"highest": highest}).rowcount
+        if not updated:
+            conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('interactions', :highest)"),
+                         {"highest": highest})
+
+
+def _create_search_index(conn: Connection) -> None:
+    if conn.dialect.name != "sqlite":
+        return
+    try:
+        conn.execute(text(search_index.CREATE_FTS_TABLE))
+    except OperationalError as e:
+        # SQLite built without FTS5; search_history() then returns nothing.
+        # A failed statement doesn't abort the SQLite transaction.
+        print(f"⚠️ Full-text search unavailable: {e.orig}")
+        return
+
+    session = SQLSession(bind=conn)
+    indexed = 0
+    for model in (ArchivedInteraction, Interaction):
+        last_id = 0
+        while True:
+            rows = session.query(model).filter(model.id > last_id).order_by(model.id).limit(1000).all()
+            if not rows:
+                break
+            for row, response in zip(rows, load_texts(session, [r.response for r in rows])):
+                search_index.index_interaction(
+                    session, row.session_id, row.user_id, row.agent_name,
+                    row.query, response, row.timestamp
+                )
+            indexed += len(rows)
+            last_id = rows[-1].id
+            session.expunge_all()
+    session.close()
+    if indexed:
+        print(f"🔧 Migrating DB: Indexed {indexed} interaction(s) for search")
+
+
+MIGRATIONS = [
+    Migration(1, "learning_paths.syllabus", _add_column("learning_paths", "syllabus", "TEXT DEFAULT '{}'")),
+    Migration(2, "events transcription columns", _events_transcription_columns),
+    Migration(3, "interactions (user_id, session_id, timestamp) index",
+              _create_index(Interaction, "ix_interactions_user_session_ts")),
+    Migration(4, "syllabus module tables", _create_tables(SyllabusModule, SyllabusSubtopic)),
+    Migration(5, "learning_paths.current_topic", _add_column("learning_paths", "current_topic", "VARCHAR(200)")),
+    # Loads LearningPath through the ORM, so it must follow every column it maps
+    Migration(6, "backfill syllabus rows", _backfill_syllabus_rows),
+    Migration(7, "interaction archive tables", _create_tables(ArchivedInteraction, SessionSummary)),
+    Migration(8, "text_blobs", _create_tables(TextBlob)),
+    Migration(9, "interactions_fts search index", _create_search_index, on_fresh=True),
+    Migration(10, "adk_session_snapshots", _create_tables(SessionSnapshot)),
+    Migration(11, "session_compactions and events index", _session_compaction_tables),
+    Migration(12, "repair double-encoded syllabus documents", _repair_syllabus_encoding),
+    Migration(13, "interactions AUTOINCREMENT ids", _interactions_autoincrement),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _current_version(engine: Engine) -> int | None:
+    """Highest applied version, or None if the registry table doesn't exist yet."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        return None
+
+
+@contextmanager
+def _transaction(engine: Engine) -> Iterator[Connection]:
+    """engine.begin(), but one that also covers DDL on SQLite.
+
+    pysqlite only opens a transaction before DML, so a step's ALTER/CREATE/
+    DROP statements would commit one by one and a failing step could leave
+    the schema half changed. On SQLite the driver is put in autocommit mode
+    and the transaction is begun explicitly instead; IMMEDIATE also takes
+    the write lock, so processes migrating the same file queue up.
+    """
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            yield conn
+        return
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        # SQLAlchemy's commit/rollback at the end of this block reach the
+        # driver, which then ends the explicit transaction
+        with conn.begin():
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            yield conn
+
+
+def run_migrations(engine: Engine) -> dict:
+    """Bring the schema up to date. Returns timing and what was applied."""
+    started = time.perf_counter()
+    current = from_version = _current_version(engine)
+
+    if current is None:
+        with engine.connect() as conn:
+            fresh = not inspect(conn).has_table(User.__tablename__)
+        Base.metadata.create_all(engine)
+        if fresh:
+            # create_all() already built the latest schema; just record it
+            try:
+                with _transaction(engine) as conn:
+                    for migration in MIGRATIONS:
+                        if migration.on_fresh:
+                            migration.apply(conn)
+                    conn.execute(insert(SchemaMigration), [
+                        {"version": m.version, "name": m.name} for m in MIGRATIONS
+                    ])
+            except IntegrityError:
+                pass  # another process stamped it first
+            current = LATEST_VERSION
+        else:
+            # Created before the registry existed: replay every step
+            current = 0
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        print(f"🔧 Migrating DB: {migration.version:03d} {migration.name}")
+        try:
+            with _transaction(engine) as conn:
+                done = conn.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+                if done >= migration.version:
+                    continue  # another process applied it while we waited for the lock
+                migration.apply(conn)
+                conn.execute(insert(SchemaMigration).values(version=migration.version, name=migration.name))
+            applied.append(migration.version)
+        except IntegrityError:
+            # Another process applied it first
+            pass
+        except Exception as e:
+            # Rolled back as a whole; don't run the app on a schema it doesn't expect
+            print(f"⚠️ Migration {migration.version} ({migration.name}) failed: {e}")
+            raise
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats = {
+        "from_version": from_version,  # None: no registry yet
+        "to_version": applied[-1] if applied else current,
+        "applied": applied,
+        "elapsed_ms": elapsed_ms,
+    }
+    logger.info("Database schema at version %s (%d migration(s) applied) in %.1f ms",
+                stats["to_version"], len(applied), elapsed_ms)
+    return stats
@@ -0,0 +1,150 @@
+"""SQLAlchemy models for persistent storage."""
+from sqlalchemy import Column, String, Text, DateTime, Integer, Float, LargeBinary, Index, ForeignKey, UniqueConstraint
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+Base = declarative_base()
+
+class SchemaMigration(Base):
+    """Applied schema migrations; see utils/migrations.py."""
+    __tablename__ = 'schema_migrations'
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(200), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class User(Base):
+    __tablename__ = 'users'
+    user_id = Column(String(100), primary_key=True)
+    name = Column(String(200), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Interaction(Base):
+    __tablename__ = 'interactions'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(100), nullable=False, index=True)
+    user_id = Column(String(100), nullable=False, index=True)
+    agent_name = Column(String(100))
+    query = Column(Text)
+    response = Column(Text)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Serves "latest N turns of a session" without a sort step
+        Index('ix_interactions_user_session_ts', 'user_id', 'session_id', 'timestamp'),
+        # Ids are never reused, even once the newest rows are archived or
+        # deleted, so they stay unique across the archive too
+        {'sqlite_autoincrement': True},
+    )
+
+class ArchivedInteraction(Base):
+    """Cold copy of interactions older than the hot window; ids are kept."""
+    __tablename__ = 'interactions_archive'
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    session_id = Column(String(100), nullable=False)
+    user_id = Column(String(100), nullable=False, index=True)
+    agent_name = Column(String(100))
+    query = Column(Text)
+    response = Column(Text)
+    timestamp = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_interactions_archive_user_session_ts', 'user_id', 'session_id', 'timestamp'),
+    )
+
+class SessionSummary(Base):
+    """Per-session rollup of the interactions moved to the archive."""
+    __tablename__ = 'session_summaries'
+    user_id = Column(String(100), primary_key=True)
+    session_id = Column(String(100), primary_key=True)
+    archived_count = Column(Integer, nullable=False, default=0)
+    first_at = Column(DateTime)
+    last_archived_at = Column(DateTime)
+    agents = Column(Text, default='[]')  # JSON list of agent names seen
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class TextBlob(Base):
+    """Compressed large text, shared by every row whose value hashes the same."""
+    __tablename__ = 'text_blobs'
+    hash = Column(String(64), primary_key=True)  # sha256 of the UTF-8 text
+    codec = Column(String(10), nullable=False)  # 'zlib' or 'zstd'
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # original length in bytes
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+class SessionSnapshot(Base):
+    """ADK session spilled out of TieredSessionService's memory; see utils/session_service.py."""
+    __tablename__ = 'adk_session_snapshots'
+    app_name = Column(String(100), primary_key=True)
+    user_id = Column(String(100), primary_key=True)
+    session_id = Column(String(100), primary_key=True)
+    data = Column(Text, nullable=False)  # Session.model_dump_json(), usually a text_blobs reference
+    user_state = Column(Text, default='{}')  # the user's 'user:' state, JSON
+    event_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class SessionCompaction(Base):
+    """Newest compaction event of an ADK session's event log; see utils/event_compaction.py."""
+    __tablename__ = 'session_compactions'
+    app_name = Column(String(128), primary_key=True)
+    user_id = Column(String(128), primary_key=True)
+    session_id = Column(String(128), primary_key=True)
+    summary_event_id = Column(String(128), nullable=False)
+    summary_timestamp = Column(Float, nullable=False)  # event timestamp, seconds since the epoch
+    events_compacted = Column(Integer, default=0)  # over every compaction so far
+    compactions = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class StudentProfile(Base):
+    __tablename__ = 'student_profiles'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(100), nullable=False, index=True)
+    subject = Column(String(50), nullable=False)  # e.g., 'dsa', 'math'
+    level = Column(String(50), default='beginner')  # e.g., 'beginner', 'intermediate'
+    details = Column(Text, default='{}')  # JSON string for granular tracking
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LearningPath(Base):
+    __tablename__ = 'learning_paths'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(100), nullable=False, index=True)
+    session_id = Column(String(100), nullable=False, unique=True)
+    subject = Column(String(50), nullable=False)
+    title = Column(String(200), nullable=False)
+    syllabus = Column(Text, default='{}')  # JSON string for path-specific syllabus
+    current_topic = Column(String(200), nullable=True)  # Overrides syllabus["current_topic"] when set
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class SyllabusModule(Base):
+    """One module of a learning path's syllabus, normalized out of the JSON blob."""
+    __tablename__ = 'syllabus_modules'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    path_id = Column(Integer, ForeignKey('learning_paths.id', ondelete='CASCADE'), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String(200), nullable=False)
+    status = Column(String(20), nullable=False, default='pending')  # 'pending', 'in_progress', 'completed'
+
+    subtopics = relationship(
+        'SyllabusSubtopic',
+        order_by='SyllabusSubtopic.position',
+        cascade='all, delete-orphan',
+        lazy='selectin'
+    )
+
+    __table_args__ = (
+        UniqueConstraint('path_id', 'position', name='uq_syllabus_modules_path_position'),
+        # Progress aggregates: COUNT(*) GROUP BY status for one path
+        Index('ix_syllabus_modules_path_status', 'path_id', 'status'),
+    )
+
+class SyllabusSubtopic(Base):
+    __tablename__ = 'syllabus_subtopics'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    module_id = Column(Integer, ForeignKey('syllabus_modules.id', ondelete='CASCADE'), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String(200), nullable=False)
+    status = Column(String(20), nullable=False, default='pending')
+
+    __table_args__ = (
+        UniqueConstraint('module_id', 'position', name='uq_syllabus_subtopics_module_position'),
+    )
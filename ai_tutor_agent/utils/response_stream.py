@@ -0,0 +1,98 @@
+"""Incremental rendering of agent replies, with time-to-first-token tracking."""
+from collections import deque
+from typing import Callable, Iterable, Iterator
+import logging
+import threading
+import time
+
+from google.adk.events.event import Event
+
+logger = logging.getLogger(__name__)
+
+
+def _event_text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(p.text for p in event.content.parts if p.text and not p.thought)
+
+
+class ResponseStream:
+    """Iterates a runner's events as text chunks, e.g. for ``st.write_stream``.
+
+    With ``StreamingMode.SSE`` each model turn arrives as partial events
+    followed by one event repeating the whole text; the repeat is skipped.
+    Without streaming the complete texts come through as they are.
+    ``on_author(author)`` is called before the first chunk of each agent that
+    produces text. After iteration ``text`` holds the full reply and
+    ``author`` the agent that wrote its end.
+    """
+
+    def __init__(self, events: Iterable[Event], on_author: Callable[[str], None] = None,
+                 default_author: str = "root_agent"):
+        self._events = events
+        self._on_author = on_author
+        self.author = default_author
+        self.text = ""
+        self.first_token_ms: float | None = None
+        self.total_ms: float | None = None
+        self._started = time.perf_counter()
+
+    def __iter__(self) -> Iterator[str]:
+        streamed = False  # partial chunks of the current model turn were yielded
+        new_message = False
+        announced = False
+        for event in self._events:
+            text = _event_text(event)
+            if event.partial:
+                streamed = streamed or bool(text)
+            elif streamed:
+                # The aggregate of the chunks just shown
+                streamed = False
+                new_message = True
+                continue
+            else:
+                new_message = bool(self.text)
+            if not text:
+                continue
+
+            if not announced or (event.author and event.author != self.author):
+                self.author = event.author or self.author
+                announced = True
+                if self._on_author:
+                    self._on_author(self.author)
+            if self.first_token_ms is None:
+                self.first_token_ms = (time.perf_counter() - self._started) * 1000
+            if new_message and self.text:
+                text = "\n\n" + text
+            new_message = False
+            self.text += text
+            yield text
+        self.total_ms = (time.perf_counter() - self._started) * 1000
+
+
+class LatencyStats:
+    """Rolling time-to-first-token and total latency of recent replies."""
+
+    def __init__(self, window: int = 500):
+        self._samples: deque = deque(maxlen=window)  # (first_token_ms, total_ms)
+        self._lock = threading.Lock()
+
+    def record(self, stream: ResponseStream) -> None:
+        if stream.first_token_ms is None or stream.total_ms is None:
+            return
+        with self._lock:
+            self._samples.append((stream.first_token_ms, stream.total_ms))
+        logger.info("Reply by %s: first token after %.0f ms, complete after %.0f ms",
+                    stream.author, stream.first_token_ms, stream.total_ms)
+
+    def get_stats(self) -> dict:
+        """Sample count plus average, p50 and p95 of both latencies, in ms."""
+        with self._lock:
+            samples = list(self._samples)
+        stats = {"replies": len(samples)}
+        for index, name in enumerate(("first_token", "total")):
+            values = sorted(s[index] for s in samples)
+            stats[f"{name}_avg_ms"] = sum(values) / len(values) if values else 0.0
+            stats[f"{name}_p50_ms"] = values[len(values) // 2] if values else 0.0
+            stats[f"{name}_p95_ms"] = values[min(len(values) - 1, int(len(values) * 0.95))] if values else 0.0
+        return stats
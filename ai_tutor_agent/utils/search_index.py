@@ -0,0 +1,115 @@
+"""SQLite FTS5 index over interaction queries and responses.
+
+``interactions_fts`` keeps its own copy of the text, because responses may be
+stored as compressed blob references that FTS5 can't read. It is written in
+the same transaction as the interaction itself (see
+``db_queries.log_interaction``). Archival doesn't touch it, so search
+keeps covering archived turns.
+
+Each row carries a ``user_key`` token (a hash of the user id) that searches
+match on, so a query only ever walks that user's postings.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session as SQLSession
+from datetime import datetime
+import hashlib
+import re
+
+FTS_TABLE = "interactions_fts"
+
+CREATE_FTS_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    user_key,
+    query,
+    response,
+    session_id UNINDEXED,
+    agent_name UNINDEXED,
+    timestamp UNINDEXED,
+    tokenize = 'porter unicode61'
+)
+"""
+
+_INSERT = text(f"""
+INSERT INTO {FTS_TABLE} (user_key, query, response, session_id, agent_name, timestamp)
+VALUES (:user_key, :query, :response, :session_id, :agent_name, :timestamp)
+""")
+
+# Column weights for bm25(): user_key, query, response. A hit in the
+# student's own question says more than one in a long answer.
+_SEARCH = text(f"""
+SELECT session_id, agent_name, timestamp,
+       snippet({FTS_TABLE}, 1, '**', '**', '…', 12) AS query_snippet,
+       snippet({FTS_TABLE}, 2, '**', '**', '…', 24) AS response_snippet,
+       bm25({FTS_TABLE}, 0.0, 2.0, 1.0) AS score
+FROM {FTS_TABLE}
+WHERE {FTS_TABLE} MATCH :match
+ORDER BY score
+LIMIT :limit
+""")
+
+_DELETE_USER = text(f"""
+DELETE FROM {FTS_TABLE} WHERE rowid IN (
+    SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match
+)
+""")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def user_key(user_id: str) -> str:
+    """Single alphanumeric token identifying a user inside the index."""
+    return "u" + hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:20]
+
+
+def _user_match(user_id: str) -> str:
+    return f'user_key : "{user_key(user_id)}"'
+
+
+def to_match_query(user_id: str, search_text: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must appear, the last as a prefix.
+
+    Words are quoted so user input can never inject FTS5 syntax. Returns None
+    if the text has no searchable words.
+    """
+    words = _WORD.findall(search_text or "")
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}" *']
+    return f"{_user_match(user_id)} AND {{query response}} : ({' '.join(terms)})"
+
+
+def index_interaction(session: SQLSession, session_id: str, user_id: str, agent_name: str,
+                      query: str, response: str, timestamp: datetime) -> None:
+    """Add one interaction's plain text to the index."""
+    session.execute(_INSERT, {
+        "user_key": user_key(user_id),
+        "query": query or "",
+        "response": response or "",
+        "session_id": session_id,
+        "agent_name": agent_name,
+        "timestamp": timestamp.isoformat(),
+    })
+
+
+def search(session: SQLSession, user_id: str, search_text: str, limit: int = 10) -> list:
+    """Best bm25 matches for one user, with highlighted snippets."""
+    match = to_match_query(user_id, search_text)
+    if match is None:
+        return []
+    rows = session.execute(_SEARCH, {"match": match, "limit": limit}).mappings().all()
+    return [{
+        "session_id": r["session_id"],
+        "agent": r["agent_name"],
+        "timestamp": r["timestamp"],
+        "query": r["query_snippet"],
+        "snippet": r["response_snippet"],
+        "score": round(-r["score"], 3),  # bm25() is lower-is-better
+    } for r in rows]
+
+
+def delete_users(session: SQLSession, user_ids: list) -> int:
+    """Remove every indexed row of the given users. Returns rows deleted."""
+    return sum(
+        session.execute(_DELETE_USER, {"match": _user_match(user_id)}).rowcount
+        for user_id in user_ids
+    )
@@ -0,0 +1,108 @@
+"""Background compaction of long DatabaseSessionService event logs."""
+from datetime import datetime
+import os
+import threading
+import time
+
+from ai_tutor_agent.utils.db_manager import DBManager
+from ai_tutor_agent.utils import event_compaction
+
+
+class SessionCompactor:
+    """Shrinks ADK sessions with more than ``min_events`` events to ``keep_events``.
+
+    Older events become one compaction event holding a rolling summary and a
+    state snapshot (see event_compaction), one session per transaction, so
+    loading a session costs about the same however long it has been running.
+    ADK's tables live in the primary database (shard 0).
+    """
+
+    def __init__(self, manager: DBManager = None, min_events: int = None, keep_events: int = None,
+                 max_summary_chars: int = None, batch_size: int = None, interval_seconds: float = None):
+        self.manager = manager or DBManager()
+        self.min_events = min_events or int(os.getenv("SESSION_COMPACT_MIN_EVENTS", "200"))
+        self.keep_events = max(1, keep_events or int(os.getenv("SESSION_COMPACT_KEEP_EVENTS", "50")))
+        self.max_summary_chars = max_summary_chars or int(os.getenv("SESSION_COMPACT_SUMMARY_CHARS", "4000"))
+        self.batch_size = batch_size or int(os.getenv("SESSION_COMPACT_BATCH_SIZE", "100"))
+        self.interval_seconds = interval_seconds or float(os.getenv("SESSION_COMPACT_INTERVAL_SECONDS", "3600"))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "sessions_compacted": 0,
+            "events_removed": 0,
+            "last_run_at": None,
+            "last_run_ms": 0.0,
+        }
+
+    def compact_session(self, app_name: str, user_id: str, session_id: str) -> int:
+        """Compact one session now. Returns the number of events removed."""
+        session = self.manager.Session()
+        try:
+            removed = event_compaction.compact_session(
+                session, app_name, user_id, session_id, self.keep_events, self.max_summary_chars
+            )
+            session.commit()
+            return removed
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Failed to compact session {session_id}: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def compact_once(self) -> dict:
+        """Compact every session over the threshold. Returns this run's totals."""
+        started = time.perf_counter()
+        session = self.manager.Session()
+        try:
+            keys = event_compaction.find_sessions_to_compact(session, self.min_events, self.batch_size)
+        finally:
+            session.close()
+
+        sessions = events = 0
+        for key in keys:
+            if self._stop.is_set():
+                break
+            removed = self.compact_session(*key)
+            if removed:
+                sessions += 1
+                events += removed
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["sessions_compacted"] += sessions
+            self._stats["events_removed"] += events
+            self._stats["last_run_at"] = datetime.utcnow().isoformat()
+            self._stats["last_run_ms"] = elapsed * 1000
+
+        if sessions:
+            print(f"🗜️ Compacted {events} event(s) in {sessions} session(s) in {elapsed * 1000:.0f} ms")
+        return {"sessions_compacted": sessions, "events_removed": events, "elapsed_ms": elapsed * 1000}
+
+    def start(self) -> None:
+        """Run compact_once() every interval_seconds on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.compact_once()
+            except Exception as e:
+                print(f"⚠️ Session compactor run failed: {e}")
+            self._stop.wait(self.interval_seconds)
@@ -0,0 +1,368 @@
+"""ADK session services backed by the app database.
+
+``TieredSessionService`` keeps hot sessions in memory and the rest in SQLite;
+``CompactingSessionService`` loads DatabaseSessionService sessions from their
+newest compaction event.
+"""
+from collections import OrderedDict
+from typing import Any, Optional
+import asyncio
+import atexit
+import os
+import threading
+
+from sqlalchemy import delete
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import DatabaseSessionService
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.session import Session
+
+from ai_tutor_agent.utils.db_manager import DBManager
+from ai_tutor_agent.utils.migrations import ensure_events_index
+from ai_tutor_agent.utils.models import SessionCompaction
+from ai_tutor_agent.utils.event_compaction import restore_compaction
+
+
+class TieredSessionService(InMemorySessionService):
+    """InMemorySessionService with a bounded hot set backed by ``adk_session_snapshots``.
+
+    At most ``max_sessions`` sessions, holding at most ``max_events`` events
+    between them, stay in memory; the least recently used ones beyond that
+    are written to the database and dropped, and loaded back the next time
+    they are accessed. Sessions are also saved when created and after every
+    agent's final response, so a restart picks each conversation up where
+    its last turn ended.
+
+    ``user:`` state is saved with each session; ``app:`` state stays in
+    memory only (nothing in this app uses it).
+    """
+
+    def __init__(self, manager: DBManager = None, max_sessions: int = None, max_events: int = None):
+        super().__init__()
+        self.manager = manager or DBManager()
+        self.max_sessions = max(1, max_sessions or int(os.getenv("SESSION_CACHE_MAX_SESSIONS", "200")))
+        self.max_events = max_events or int(os.getenv("SESSION_CACHE_MAX_EVENTS", "20000"))
+        # (app_name, user_id, session_id) -> event count, least recently used first
+        self._lru: OrderedDict = OrderedDict()
+        self._hot_events = 0
+        self._dirty: set = set()  # hot sessions changed since they were last saved
+        # Streamlit drives the runner from several script threads
+        self._lock = threading.RLock()
+        # Set while creating a session: its existence check must not read the database
+        self._local = threading.local()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "rehydrated": 0,
+            "evictions": 0,
+            "saves": 0,
+            "save_failures": 0,
+        }
+        atexit.register(self.flush)
+
+    def _create_session_impl(self, *, app_name: str, user_id: str,
+                             state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        if session_id:
+            # Loaded if it exists, so the in-memory existence check catches it
+            self._ensure_loaded(app_name, user_id, session_id, count=False)
+        session, key, captured = self._create_hot(app_name, user_id, state, session_id)
+        self._record_save(key, captured, self._write(key, captured))
+        self._evict()
+        return session
+
+    async def create_session(self, *, app_name: str, user_id: str,
+                             state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        if session_id:
+            await self._ensure_loaded_async(app_name, user_id, session_id, count=False)
+        session, key, captured = self._create_hot(app_name, user_id, state, session_id)
+        self._record_save(key, captured, await asyncio.to_thread(self._write, key, captured))
+        await self._evict_async()
+        return session
+
+    def _get_session_impl(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        if getattr(self._local, "hot_only", False):
+            return super()._get_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+        if not self._ensure_loaded(app_name, user_id, session_id):
+            return None
+        with self._lock:
+            return super()._get_session_impl(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        if not await self._ensure_loaded_async(app_name, user_id, session_id):
+            return None
+        with self._lock:
+            return super()._get_session_impl(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=config
+            )
+
+    def _list_sessions_impl(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        with self._lock:
+            response = super()._list_sessions_impl(app_name=app_name, user_id=user_id)
+        hot = {(s.user_id, s.id) for s in response.sessions}
+        for data in self.manager.list_session_snapshots(app_name, user_id):
+            session = Session.model_validate_json(data)
+            if (session.user_id, session.id) in hot:
+                continue
+            session.events = []
+            with self._lock:
+                response.sessions.append(self._merge_state(app_name, session.user_id, session))
+        return response
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list_sessions_impl, app_name=app_name, user_id=user_id)
+
+    def _delete_session_impl(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            key = (app_name, user_id, session_id)
+            if key in self._lru:
+                self._drop(key)
+        self.manager.delete_session_snapshot(app_name, user_id, session_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_session_impl, app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        # The runner may still hold a session that was evicted mid-turn
+        await self._ensure_loaded_async(*key, count=False)
+        captured = None
+        # InMemorySessionService.append_event never suspends, so the lock is
+        # not held across a real await
+        with self._lock:
+            event = await super().append_event(session=session, event=event)
+            if key in self._lru:
+                self._touch(key, len(self.sessions[key[0]][key[1]][key[2]].events))
+                self._dirty.add(key)
+                if event.author != "user" and event.is_final_response():
+                    captured = self._capture(key)
+        # Serialized and written off the event loop, which every turn shares
+        if captured is not None:
+            self._record_save(key, captured, await asyncio.to_thread(self._write, key, captured))
+        await self._evict_async()
+        return event
+
+    def flush(self) -> int:
+        """Save every hot session changed since its last save. Returns sessions saved."""
+        with self._lock:
+            pending = [(key, self._capture(key)) for key in list(self._dirty)]
+        saved = 0
+        for key, captured in pending:
+            ok = self._write(key, captured)
+            self._record_save(key, captured, ok)
+            saved += ok
+        return saved
+
+    def get_stats(self) -> dict:
+        """Hit/miss, eviction and save counters plus the current hot set size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hot_sessions"] = len(self._lru)
+            stats["hot_events"] = self._hot_events
+            stats["unsaved_sessions"] = len(self._dirty)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _touch(self, key: tuple, events: int) -> None:
+        self._hot_events += events - self._lru.get(key, 0)
+        self._lru[key] = events
+        self._lru.move_to_end(key)
+
+    def _create_hot(self, app_name: str, user_id: str, state: Optional[dict], session_id: Optional[str]) -> tuple:
+        with self._lock:
+            self._local.hot_only = True
+            try:
+                session = super()._create_session_impl(
+                    app_name=app_name, user_id=user_id, state=state, session_id=session_id
+                )
+            finally:
+                self._local.hot_only = False
+            key = (app_name, user_id, session.id)
+            self._touch(key, 0)
+            self._dirty.add(key)
+            return session, key, self._capture(key)
+
+    def _lookup(self, key: tuple, count: bool = True) -> bool:
+        """True if the session is hot; ``count`` records it as a hit or miss."""
+        with self._lock:
+            hot = key in self._lru
+            if hot:
+                self._lru.move_to_end(key)
+            if count:
+                self._stats["hits" if hot else "misses"] += 1
+            return hot
+
+    def _ensure_loaded(self, app_name: str, user_id: str, session_id: str, count: bool = True) -> bool:
+        """Make sure the session is in memory. Returns False if it doesn't exist."""
+        key = (app_name, user_id, session_id)
+        if self._lookup(key, count):
+            return True
+        if not self._install(key, self._read(key)):
+            return False
+        self._evict()
+        return True
+
+    async def _ensure_loaded_async(self, app_name: str, user_id: str, session_id: str,
+                                   count: bool = True) -> bool:
+        """_ensure_loaded() with the snapshot read on a worker thread."""
+        key = (app_name, user_id, session_id)
+        if self._lookup(key, count):
+            return True
+        if not self._install(key, await asyncio.to_thread(self._read, key)):
+            return False
+        await self._evict_async()
+        return True
+
+    def _read(self, key: tuple) -> Optional[tuple]:
+        """Load and parse a snapshot, without the lock."""
+        snapshot = self.manager.load_session_snapshot(*key)
+        if snapshot is None:
+            return None
+        return Session.model_validate_json(snapshot["data"]), snapshot["user_state"]
+
+    def _install(self, key: tuple, loaded: Optional[tuple]) -> bool:
+        """Put a session read by _read() in memory, unless another caller already did."""
+        app_name, user_id, session_id = key
+        with self._lock:
+            if key in self._lru:
+                return True
+            if loaded is None:
+                return False
+            session, user_state = loaded
+            self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+            # A user with other hot sessions already has newer state in memory
+            self.user_state.setdefault(app_name, {}).setdefault(user_id, user_state)
+            self._touch(key, len(session.events))
+            self._stats["rehydrated"] += 1
+            return True
+
+    def _capture(self, key: tuple) -> tuple:
+        """What _write() needs, copied under the lock so it can run without it.
+
+        Events are never changed once appended, so copying the lists and
+        state dicts is enough.
+        """
+        app_name, user_id, session_id = key
+        session = self.sessions[app_name][user_id][session_id]
+        copy = session.model_copy(update={"events": list(session.events), "state": dict(session.state)})
+        return copy, dict(self.user_state.get(app_name, {}).get(user_id, {}))
+
+    def _write(self, key: tuple, captured: tuple) -> bool:
+        """Serialize and store a captured session; runs without the lock."""
+        session, user_state = captured
+        return self.manager.save_session_snapshot(
+            *key, session.model_dump_json(), user_state, len(session.events)
+        )
+
+    def _record_save(self, key: tuple, captured: tuple, saved: bool) -> None:
+        with self._lock:
+            if saved:
+                # Still dirty if events arrived while it was being written
+                if self._lru.get(key) == len(captured[0].events):
+                    self._dirty.discard(key)
+                self._stats["saves"] += 1
+            else:
+                self._stats["save_failures"] += 1
+
+    def _next_victim(self) -> Optional[tuple]:
+        """Drop clean sessions past the limits; return a dirty one to save first, with its capture."""
+        with self._lock:
+            # The most recently used session always stays, however many events it has
+            while len(self._lru) > self.max_sessions or (self._hot_events > self.max_events and len(self._lru) > 1):
+                key = next(iter(self._lru))
+                if key in self._dirty:
+                    return key, self._capture(key)
+                self._drop(key)
+                self._stats["evictions"] += 1
+            return None
+
+    def _evicted(self, key: tuple, captured: tuple, saved: bool) -> bool:
+        """Drop a saved victim unless it was used meanwhile. False stops the eviction."""
+        self._record_save(key, captured, saved)
+        if not saved:
+            # Keep it rather than lose its events; the next eviction retries
+            return False
+        with self._lock:
+            if key in self._lru and key not in self._dirty and next(iter(self._lru)) == key:
+                self._drop(key)
+                self._stats["evictions"] += 1
+        return True
+
+    def _evict(self) -> None:
+        """Drop least recently used sessions until the hot set is within its limits."""
+        while (victim := self._next_victim()) is not None:
+            if not self._evicted(*victim, self._write(*victim)):
+                break
+
+    async def _evict_async(self) -> None:
+        while (victim := self._next_victim()) is not None:
+            if not self._evicted(*victim, await asyncio.to_thread(self._write, *victim)):
+                break
+
+    def _drop(self, key: tuple) -> None:
+        app_name, user_id, session_id = key
+        self._hot_events -= self._lru.pop(key)
+        self._dirty.discard(key)
+        user_sessions = self.sessions[app_name][user_id]
+        user_sessions.pop(session_id, None)
+        if not user_sessions:
+            # Saved with the session; reloaded with the user's next session
+            del self.sessions[app_name][user_id]
+            self.user_state.get(app_name, {}).pop(user_id, None)
+
+
+class CompactingSessionService(DatabaseSessionService):
+    """DatabaseSessionService that starts each load at the newest compaction event.
+
+    SessionCompactor replaces old events with a summary event and records its
+    timestamp in ``session_compactions``. ``get_session`` without an explicit
+    ``after_timestamp`` passes that one, so a load is an index range scan over
+    the summary and the events after it, whatever the session's age.
+    """
+
+    async def _ensure_tables_created(self):
+        if self._tables_created:
+            return
+        await super()._ensure_tables_created()
+        # ADK may have just created 'events' on a database migrated without it
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(ensure_events_index)
+            await conn.run_sync(lambda c: SessionCompaction.__table__.create(bind=c, checkfirst=True))
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        if config is None or config.after_timestamp is None:
+            await self._ensure_tables_created()
+            async with self.database_session_factory() as sql_session:
+                record = await sql_session.get(SessionCompaction, (app_name, user_id, session_id))
+            if record is not None:
+                config = GetSessionConfig(
+                    num_recent_events=config.num_recent_events if config else None,
+                    after_timestamp=record.summary_timestamp,
+                )
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            for event in session.events:
+                restore_compaction(event)
+        return session
+
+    async def delete_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        async with self.database_session_factory() as sql_session:
+            await sql_session.execute(delete(SessionCompaction).where(
+                SessionCompaction.app_name == app_name,
+                SessionCompaction.user_id == user_id,
+                SessionCompaction.session_id == session_id,
+            ))
+            await sql_session.commit()
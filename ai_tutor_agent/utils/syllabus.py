@@ -0,0 +1,188 @@
+"""Helpers for the syllabus JSON documents agents store on learning paths."""
+from typing import NamedTuple
+import hashlib
+import json
+
+from ai_tutor_agent.utils.cache import LRUCache, MISSING
+
+SYLLABUS_STATUSES = ("pending", "in_progress", "completed")
+
+
+def parse_syllabus(raw) -> dict | None:
+    """Decode a stored syllabus into ``{"syllabus": [...], ...}``.
+
+    Agents sometimes pass the JSON already encoded as a string, so legacy rows
+    can be encoded up to three times. A bare list is wrapped as the module list.
+    Returns None for anything that isn't a syllabus document.
+    """
+    data = raw
+    for _ in range(3):
+        if not isinstance(data, str):
+            break
+        try:
+            data = json.loads(data)
+        except (ValueError, TypeError):
+            return None
+
+    if isinstance(data, list):
+        return {"syllabus": data}
+    if isinstance(data, dict):
+        return data
+    return None
+
+
+def normalize_status(status) -> str:
+    """Map free-form status strings onto SYLLABUS_STATUSES."""
+    status = str(status or "pending").strip().lower().replace(" ", "_").replace("-", "_")
+    return status if status in SYLLABUS_STATUSES else "pending"
+
+
+def normalize_modules(data: dict | None) -> list:
+    """Return the module list as ``[{"module", "status", "subtopics"}, ...]``."""
+    if not data or not isinstance(data.get("syllabus"), list):
+        return []
+
+    modules = []
+    for item in data["syllabus"]:
+        if isinstance(item, dict):
+            subtopics = item.get("subtopics") or []
+            if not isinstance(subtopics, list):
+                subtopics = [subtopics]
+            modules.append({
+                "module": str(item.get("module") or "Module"),
+                "status": normalize_status(item.get("status")),
+                "subtopics": [str(sub) for sub in subtopics],
+            })
+        elif item:
+            modules.append({"module": str(item), "status": "pending", "subtopics": []})
+    return modules
+
+
+def syllabus_hash(raw) -> str:
+    """Short content hash of a syllabus document, independent of key order."""
+    data = parse_syllabus(raw)
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def canonical_syllabus(raw):
+    """Single-encoded JSON for a syllabus document, or raw unchanged if it isn't one.
+
+    Applied on write, so agents that encode their JSON twice don't leave
+    rows every reader has to unwrap.
+    """
+    data = parse_syllabus(raw)
+    return json.dumps(data) if data is not None else raw
+
+
+def unwrap_json(raw):
+    """Single-encoded JSON for raw JSON encoded as a JSON string, else raw unchanged.
+
+    Unlike canonical_syllabus() the value itself is kept as is, for
+    free-form documents such as profile details.
+    """
+    data = raw
+    for _ in range(3):
+        if not isinstance(data, str):
+            break
+        try:
+            decoded = json.loads(data)
+        except (ValueError, TypeError):
+            break
+        if not isinstance(decoded, str):
+            return json.dumps(decoded) if data is not raw else raw
+        data = decoded
+    return raw
+
+
+class SyllabusEntry(NamedTuple):
+    module: str
+    status: str
+    subtopics: tuple = ()
+
+    def to_dict(self) -> dict:
+        return {"module": self.module, "status": self.status, "subtopics": list(self.subtopics)}
+
+
+class Syllabus(NamedTuple):
+    """A parsed syllabus, as the UI, tools and progress counts use it.
+
+    Immutable, so one instance can be shared by every reader of the same
+    document (see load_syllabus()).
+    """
+    modules: tuple = ()
+    current_topic: str | None = None
+
+    @classmethod
+    def from_data(cls, data: dict | None) -> "Syllabus":
+        topic = data.get("current_topic") if data else None
+        return cls(
+            modules=tuple(
+                SyllabusEntry(m["module"], m["status"], tuple(m["subtopics"]))
+                for m in normalize_modules(data)
+            ),
+            current_topic=str(topic) if topic else None,
+        )
+
+    @classmethod
+    def from_rows(cls, modules: list, current_topic: str | None = None) -> "Syllabus":
+        """Build from SyllabusModule rows (models), ordered by position."""
+        return cls(
+            modules=tuple(
+                SyllabusEntry(m.name, m.status, tuple(sub.name for sub in m.subtopics))
+                for m in modules
+            ),
+            current_topic=current_topic,
+        )
+
+    def progress(self) -> dict:
+        """Module counts per status plus total and completed ratio."""
+        progress = {status: 0 for status in SYLLABUS_STATUSES}
+        for m in self.modules:
+            progress[m.status] += 1
+        progress["total"] = len(self.modules)
+        progress["percent"] = progress["completed"] / progress["total"] if progress["total"] else 0.0
+        return progress
+
+    def module_dicts(self) -> list:
+        return [m.to_dict() for m in self.modules]
+
+    def to_dict(self) -> dict:
+        """Structured form for tool results."""
+        return {
+            "current_topic": self.current_topic,
+            "modules": self.module_dicts(),
+            "progress": self.progress(),
+        }
+
+
+# sha256 of the stored text -> Syllabus
+_parsed = LRUCache(256)
+
+
+def load_syllabus(raw) -> Syllabus:
+    """Parse a stored syllabus document, at most once per distinct content."""
+    if not raw or raw == "{}":
+        return Syllabus()
+    key = hashlib.sha256(raw.encode("utf-8")).digest() if isinstance(raw, str) else None
+    if key is not None:
+        cached = _parsed.get(key)
+        if cached is not MISSING:
+            return cached
+    syllabus = Syllabus.from_data(parse_syllabus(raw))
+    if key is not None:
+        _parsed.set(key, syllabus)
+    return syllabus
+
+
+def syllabus_context(raw) -> dict | None:
+    """The stored document as the agent wrote it, plus its progress counts.
+
+    For tool results: keys the Syllabus model doesn't know about, on the
+    document or on its modules, reach the model unchanged, and so does a
+    current_topic set before any modules. None if nothing is stored.
+    """
+    data = parse_syllabus(raw) if raw else None
+    if not data:
+        return None
+    return {**data, "progress": load_syllabus(raw).progress()}
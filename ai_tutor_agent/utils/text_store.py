@@ -0,0 +1,165 @@
+"""Compressed, content-addressed storage for large text columns.
+
+Values at or above the codec's size threshold are stored once in
+``text_blobs`` keyed by their SHA-256, and the column holds a short reference
+instead. Identical payloads (greetings, capability blurbs, repeated
+syllabi) therefore share one compressed row. Reads resolve references only
+when a value is actually returned, so callers always see plain strings.
+
+The codec comes from ``session.info["text_codec"]``, which DBManager sets on
+its sessionmaker. Sessions without one store text as-is but still read
+references.
+"""
+from sqlalchemy import select, union, func
+from sqlalchemy.orm import Session as SQLSession
+from datetime import datetime
+import hashlib
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+from ai_tutor_agent.utils.cache import LRUCache, MISSING
+from ai_tutor_agent.utils.models import (
+    TextBlob, Interaction, ArchivedInteraction, LearningPath, StudentProfile, SessionSnapshot
+)
+
+# store_text() never writes plain text that starts with this prefix (such a
+# value is stored as a blob), so any column value carrying it is a reference
+BLOB_REF_PREFIX = "blob:sha256:"
+
+# Columns that may hold references; gc_text_blobs() keeps anything they point to
+REFERENCING_COLUMNS = (
+    Interaction.response,
+    ArchivedInteraction.response,
+    LearningPath.syllabus,
+    StudentProfile.details,
+    SessionSnapshot.data,
+)
+
+# hash -> decoded text. Blobs are immutable, so entries never go stale.
+_decoded = LRUCache(512)
+
+
+class TextCodec:
+    """Compression settings for values written through text_store."""
+
+    def __init__(self, min_bytes: int = 512, algorithm: str = None):
+        if algorithm is None:
+            algorithm = "zstd" if zstandard is not None else "zlib"
+        if algorithm == "zstd" and zstandard is None:
+            print("⚠️ zstandard is not installed; compressing text with zlib")
+            algorithm = "zlib"
+        if algorithm not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown text codec: {algorithm}")
+        self.min_bytes = min_bytes
+        self.algorithm = algorithm
+
+    def compress(self, data: bytes) -> bytes:
+        if self.algorithm == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This database has zstd-compressed text; install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return raw.decode("utf-8")
+
+
+def store_text(session: SQLSession, value: str | None) -> str | None:
+    """Return what to put in the column for ``value``: the text itself or a blob reference."""
+    codec = session.info.get("text_codec")
+    if codec is None or value is None:
+        return value
+
+    data = value.encode("utf-8")
+    if len(data) < codec.min_bytes and not value.startswith(BLOB_REF_PREFIX):
+        return value
+
+    digest = hashlib.sha256(data).hexdigest()
+    # Touching the row doubles as the existence check and holds it against a
+    # concurrent gc_text_blobs() until this transaction commits its reference.
+    reused = session.query(TextBlob).filter_by(hash=digest).update(
+        {TextBlob.last_used_at: datetime.utcnow()}, synchronize_session=False
+    )
+    if not reused:
+        session.add(TextBlob(hash=digest, codec=codec.algorithm, data=codec.compress(data), size=len(data)))
+    _decoded.set(digest, value)
+    return BLOB_REF_PREFIX + digest
+
+
+def load_texts(session: SQLSession, values: list) -> list:
+    """Resolve a list of stored column values, fetching all missing blobs in one query."""
+    digests = {
+        v[len(BLOB_REF_PREFIX):] for v in values
+        if isinstance(v, str) and v.startswith(BLOB_REF_PREFIX)
+    }
+    if not digests:
+        return list(values)
+
+    resolved = {}
+    for digest in digests:
+        text = _decoded.get(digest)
+        if text is not MISSING:
+            resolved[digest] = text
+    missing = digests - resolved.keys()
+    if missing:
+        for blob in session.query(TextBlob).filter(TextBlob.hash.in_(missing)):
+            text = _decompress(blob.codec, blob.data)
+            _decoded.set(blob.hash, text)
+            resolved[blob.hash] = text
+
+    return [
+        resolved.get(v[len(BLOB_REF_PREFIX):])
+        if isinstance(v, str) and v.startswith(BLOB_REF_PREFIX) else v
+        for v in values
+    ]
+
+
+def load_text(session: SQLSession, value: str | None) -> str | None:
+    """Resolve one stored column value."""
+    return load_texts(session, [value])[0]
+
+
+def discard_text(session: SQLSession, value: str | None) -> None:
+    """Delete the blob behind a replaced column value right away.
+
+    Only for values no other row can hold (e.g. text embedding the row's own
+    key); anything shareable is left to gc_text_blobs().
+    """
+    if isinstance(value, str) and value.startswith(BLOB_REF_PREFIX):
+        session.query(TextBlob).filter_by(hash=value[len(BLOB_REF_PREFIX):]).delete(synchronize_session=False)
+
+
+def gc_text_blobs(session: SQLSession) -> int:
+    """Delete blobs no column references any more. Returns blobs deleted."""
+    offset = len(BLOB_REF_PREFIX) + 1
+    referenced = union(*(
+        select(func.substr(column, offset)).where(column.startswith(BLOB_REF_PREFIX, autoescape=True))
+        for column in REFERENCING_COLUMNS
+    ))
+    return session.query(TextBlob).filter(
+        TextBlob.hash.notin_(referenced)
+    ).delete(synchronize_session=False)
+
+
+def text_blob_stats(session: SQLSession) -> dict:
+    """Blob count with stored vs. original bytes."""
+    count, stored, original = session.query(
+        func.count(TextBlob.hash), func.sum(func.length(TextBlob.data)), func.sum(TextBlob.size)
+    ).one()
+    return {
+        "blobs": count,
+        "stored_bytes": stored or 0,
+        "original_bytes": original or 0,
+        "ratio": (stored / original) if original else 1.0,
+    }
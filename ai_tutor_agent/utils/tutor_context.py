@@ -0,0 +1,87 @@
+"""Session context the app hands the agents directly, without a model turn.
+
+The root agent's instruction includes ``{tutor_context?}``; the app keeps
+that state key (plus the ids the tools read) up to date with a state-only
+event, and greets new chats from a template.
+"""
+import time
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.base_session_service import BaseSessionService
+from google.genai import types
+
+
+def format_context(user_id: str, username: str, dashboard: dict) -> str:
+    """Compact description of the learner and the chat's learning path."""
+    guest = ", guest" if user_id.startswith("guest_") else ""
+    lines = [f"User: {username} (ID: {user_id}{guest}), already logged in."]
+    path = dashboard.get("current_path")
+    if path:
+        line = f"Learning path: {path['title']} (subject: {path['subject']})"
+        profile = dashboard.get("profile")
+        if profile and profile.get("level"):
+            line += f", level {profile['level']}"
+        progress = dashboard.get("progress")
+        if progress and progress["total"]:
+            line += f", {progress['completed']}/{progress['total']} modules completed"
+        if path.get("current_topic"):
+            line += f", current topic: {path['current_topic']}"
+        lines.append(line + ".")
+    else:
+        lines.append("No learning path in this chat yet; if they pick a topic, use `create_learning_path_tool`.")
+    return "\n".join(lines)
+
+
+def context_state(user_id: str, username: str, session_id: str, dashboard: dict) -> dict:
+    """State delta with the ids the tools read and the ``tutor_context`` block."""
+    state = {
+        "authenticated": True,
+        "current_user_id": user_id,
+        f"user:{user_id}_name": username,
+        "session_id": session_id,
+        "tutor_context": format_context(user_id, username, dashboard),
+    }
+    if user_id.startswith("guest_"):
+        state["is_guest"] = True
+    return state
+
+
+def greeting(username: str, dashboard: dict) -> str:
+    """Opening message for a chat with no history yet."""
+    path = dashboard.get("current_path")
+    if not path:
+        return (
+            f"Hi {username}! 👋 Welcome to AI Tutor. What would you like to learn today: "
+            "**DSA**, **Development** or **System Design**?"
+        )
+    message = f"Welcome back, {username}! 👋 Let's continue **{path['title']}**."
+    progress = dashboard.get("progress")
+    if progress and progress["total"]:
+        message += f" You've completed {progress['completed']} of {progress['total']} modules."
+    if path.get("current_topic"):
+        message += f" Next up: **{path['current_topic']}**."
+    return message + " Ready to continue, or is there something specific you'd like to go over?"
+
+
+async def inject_context(session_service: BaseSessionService, app_name: str, user_id: str,
+                         session_id: str, state: dict, greeting_text: str = None,
+                         author: str = "ai_tutor") -> bool:
+    """Apply ``state`` to the session, with ``greeting_text`` as the agent's message.
+
+    One event carries both, so the model sees the greeting in its history.
+    Returns False if the session doesn't exist.
+    """
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        return False
+    event = Event(
+        invocation_id=Event.new_id(),
+        author=author,
+        actions=EventActions(state_delta=state),
+        timestamp=time.time(),
+    )
+    if greeting_text:
+        event.content = types.Content(role="model", parts=[types.Part(text=greeting_text)])
+    await session_service.append_event(session, event)
+    return True
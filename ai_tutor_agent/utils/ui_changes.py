@@ -0,0 +1,41 @@
+"""What a turn's tools changed, so the app only redraws what is affected.
+
+Tools that write learning paths or profiles call ``mark_changed``; the
+write lands in the turn's events as a state delta, which the app reads back
+with ``changes_in``.
+
+Each kind has its own state key holding the id of the invocation that last
+marked it, so marks from several tools, or forwarded by AgentTool (which
+``update``s the parent's state with a sub-agent's delta), never overwrite
+each other, and the state holds one small value per kind however long the
+session runs. ``temp:`` keys won't do: they are stripped from events before
+the app sees them.
+"""
+from typing import Iterable
+
+from google.adk.events.event import Event
+from google.adk.tools.tool_context import ToolContext
+
+UI_CHANGES_PREFIX = "ui_changes."
+
+PATHS = "paths"        # learning paths added or renamed
+PROGRESS = "progress"  # profile level, syllabus or module status
+
+
+def mark_changed(tool_context: ToolContext, *kinds: str) -> None:
+    """Record that this tool call changed ``kinds`` of learner data."""
+    for kind in kinds:
+        tool_context.state[UI_CHANGES_PREFIX + kind] = tool_context.invocation_id
+
+
+def changes_in(events: Iterable[Event]) -> set:
+    """Every kind marked by the tools behind ``events``."""
+    changes = set()
+    for event in events:
+        delta = event.actions.state_delta if event.actions else None
+        if delta:
+            changes.update(
+                key[len(UI_CHANGES_PREFIX):] for key, value in delta.items()
+                if key.startswith(UI_CHANGES_PREFIX) and value
+            )
+    return changes
@@ -0,0 +1,193 @@
+"""Write-behind queue that batches interaction inserts into one transaction."""
+from datetime import datetime
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from ai_tutor_agent.utils import db_queries
+
+logger = logging.getLogger(__name__)
+
+
+class _FlushRequest:
+    """Marker put on the queue; set once every row ahead of it is committed."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class InteractionWriteQueue:
+    """Background writer for ``Interaction`` rows.
+
+    Rows are committed when ``batch_size`` of them are waiting or
+    ``flush_interval`` seconds after the first one arrived, whichever comes
+    first. Pending rows are always flushed at interpreter exit.
+
+    ``session_factory(user_id)`` opens a session on the database that holds
+    that user; ``shard_key(user_id)`` groups a batch into one transaction per
+    such database.
+    """
+
+    def __init__(self, session_factory, batch_size: int = 50, flush_interval: float = 0.5,
+                 shard_key=lambda user_id: 0):
+        self._session_factory = session_factory
+        self._shard_key = shard_key
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        # Also guards _closed, so nothing is queued behind the stop marker
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._pending = 0  # queued or in the batch being collected, not yet written
+        self._stats = {
+            "enqueued": 0,
+            "flushed_rows": 0,
+            "failed_rows": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="interaction-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, session_id: str, user_id: str, agent_name: str, query: str, response: str) -> bool:
+        """Queue one interaction. Returns False once the queue is closed."""
+        with self._stats_lock:
+            if self._closed:
+                return False
+            self._stats["enqueued"] += 1
+            self._pending += 1
+            self._queue.put((session_id, user_id, agent_name, query, response, datetime.utcnow()))
+        return True
+
+    def pending(self) -> int:
+        """Number of accepted rows not yet written."""
+        with self._stats_lock:
+            return self._pending
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every row queued before this call is committed."""
+        request = _FlushRequest()
+        with self._stats_lock:
+            if self._closed:
+                # close() writes everything before it returns
+                return True
+            self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self) -> None:
+        """Flush remaining rows and stop the writer thread."""
+        with self._stats_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def get_stats(self) -> dict:
+        """Counters for queue depth and flush latency."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.pending()
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / stats["flushes"] if stats["flushes"] else 0.0
+        return stats
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self._flush_interval
+
+            # Collect until the batch is full, the deadline passes, or a
+            # flush/stop marker asks for the rows right now.
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, _FlushRequest):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.done.set()
+            if stop:
+                # Drain anything queued after close() was requested
+                leftover, waiters = [], []
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if isinstance(item, _FlushRequest):
+                        waiters.append(item)
+                    elif item is not _STOP:
+                        leftover.append(item)
+                if leftover:
+                    self._write(leftover)
+                # Only now are the rows ahead of these requests committed
+                for waiter in waiters:
+                    waiter.done.set()
+                return
+
+    def _write(self, batch: list) -> None:
+        started = time.perf_counter()
+        groups = {}
+        for row in batch:
+            groups.setdefault(self._shard_key(row[1]), []).append(row)
+
+        flushed = failed = 0
+        for rows in groups.values():
+            if self._write_rows(rows):
+                flushed += len(rows)
+                continue
+            # put() already reported these as logged: retry them one by one,
+            # so a single bad row doesn't take the rest of the batch with it
+            print(f"⚠️ Failed to flush {len(rows)} interactions; retrying them one at a time")
+            for row in rows:
+                if self._write_rows([row]):
+                    flushed += 1
+                else:
+                    failed += 1
+
+        if failed:
+            print(f"⚠️ Dropped {failed} interaction(s) that could not be written")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = elapsed_ms
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+            self._stats["total_flush_ms"] += elapsed_ms
+            self._stats["flushed_rows"] += flushed
+            self._stats["failed_rows"] += failed
+            self._pending -= len(batch)
+
+    def _write_rows(self, rows: list) -> bool:
+        """Commit rows of one shard in one transaction. Returns False if it rolled back."""
+        session = self._session_factory(rows[0][1])
+        try:
+            for row in rows:
+                db_queries.log_interaction(session, *row)
+            session.commit()
+            return True
+        except Exception:
+            session.rollback()
+            logger.exception("Failed to write %d interaction(s) for session %s", len(rows), rows[0][0])
+            return False
+        finally:
+            session.close()
@@ -22,10 +22,12 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=env_path)
 
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
 from google.genai import types
 
 from ai_tutor_agent.agent import root_agent
+from ai_tutor_agent.utils.async_db_manager import to_async_uri
+from ai_tutor_agent.utils.session_service import CompactingSessionService
+from ai_tutor_agent.utils.session_compactor import SessionCompactor
 
 
 def clean_json_response(text: str) -> str:
@@ -50,16 +52,9 @@ def clean_json_response(text: str) -> str:
 def cleanup_guest_user(guest_user_id: str):
     """Clean up guest user data on exit."""
     try:
-        from ai_tutor_agent.utils.db_manager import db_manager, User
-        db_session = db_manager.get_session()
-        try:
-            db_session.query(User).filter_by(user_id=guest_user_id).delete()
-            db_session.commit()
+        from ai_tutor_agent.utils.guest_reaper import GuestReaper
+        if GuestReaper().delete_guests([guest_user_id]):
             print("\n🗑️  Guest cleaned.")
-        except:
-            pass
-        finally:
-            db_session.close()
     except:
         pass
 
@@ -73,12 +68,9 @@ async def main():
     db_url = os.getenv("DATABASE_URI", f"sqlite:///{db_path}")
     
     # Ensure ADK uses async driver for SQLite
-    if db_url.startswith("sqlite:///"):
-        adk_db_url = db_url.replace("sqlite:///", "sqlite+aiosqlite:///")
-    else:
-        adk_db_url = db_url
-        
-    session_service = DatabaseSessionService(db_url=adk_db_url)
+    session_service = CompactingSessionService(db_url=to_async_uri(db_url))
+    # Keeps long-running sessions cheap to load
+    SessionCompactor().start()
     
     runner = Runner(
         agent=root_agent,
@@ -1,9 +1,11 @@
 import streamlit as st
 import sys
 import os
+import queue
 import uuid
+from datetime import datetime
 from google.adk.runners import Runner
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai import types
 from dotenv import load_dotenv
 
@@ -14,6 +16,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 load_dotenv("ai_tutor_agent/.env", override=True)
 
 from ai_tutor_agent.utils.db_manager import db_manager
+from ai_tutor_agent.utils.guest_reaper import GuestReaper
+from ai_tutor_agent.utils.archiver import InteractionArchiver
+from ai_tutor_agent.utils.session_service import TieredSessionService
+from ai_tutor_agent.utils.response_stream import ResponseStream, LatencyStats
+from ai_tutor_agent.utils.agent_executor import AgentExecutor, FAILED
+from ai_tutor_agent.utils import tutor_context, ui_changes
 from ai_tutor_agent.agent import root_agent
 
 st.set_page_config(page_title="AI Tutor Platform", page_icon="🎓", layout="wide")
@@ -49,7 +57,8 @@ if "sidebar_view" not in st.session_state:
 
 @st.cache_resource
 def get_runner():
-    session_service = InMemorySessionService()
+    # Bounded in memory; idle sessions live in SQLite and survive restarts
+    session_service = TieredSessionService()
     runner = Runner(
         app_name="ai_tutor",
         agent=root_agent,
@@ -57,6 +66,276 @@ def get_runner():
     )
     return runner
 
+@st.cache_resource
+def get_agent_executor():
+    # Agent turns run on one shared event loop; script threads only wait on
+    # the job handle, and a rerun mid-turn picks the same job up again
+    return AgentExecutor(get_runner())
+
+@st.cache_resource
+def get_guest_reaper():
+    # Streamlit guests never log out explicitly; expire them in the background
+    reaper = GuestReaper()
+    reaper.start()
+    return reaper
+
+@st.cache_resource
+def get_interaction_archiver():
+    # Keeps the hot interactions table bounded; history reads fall through to the archive
+    archiver = InteractionArchiver()
+    archiver.start()
+    return archiver
+
+@st.cache_data(ttl=float(os.getenv("DB_CACHE_TTL_SECONDS", "300")), max_entries=1024, show_spinner=False)
+def load_dashboard(user_id, session_id, data_version, history_limit):
+    # data_version is only part of the cache key: any write to this user's
+    # rows changes it, so a rerun with nothing new skips the queries entirely
+    return db_manager.get_dashboard(user_id, session_id, history_limit=history_limit)
+
+@st.cache_data(ttl=float(os.getenv("DB_CACHE_TTL_SECONDS", "300")), max_entries=256, show_spinner=False)
+def load_history_page(user_id, session_id, data_version, before_id, before_time, limit):
+    # Cached by cursor; data_version is only part of the key, so archiving
+    # or deleting the user's rows invalidates the pages like load_dashboard
+    if before_time is not None:
+        before_time = datetime.fromisoformat(before_time)
+    return db_manager.get_chat_history_page(user_id, session_id, before_id, limit, before_time)
+
+@st.cache_resource
+def get_latency_stats():
+    # Time to first token vs. total reply time, across every browser session
+    return LatencyStats()
+
+# Map internal agent names to friendly titles
+AGENT_DISPLAY_NAMES = {
+    "root_agent": "AI Tutor",
+    "dsa_tutor": "DSA Tutor",
+    "dsa_solver": "DSA Solver",
+    "code_generator": "Code Generator",
+    "code_reviewer": "Code Reviewer",
+    "developer_tutor": "Developer Tutor",
+    "system_design_tutor": "System Design Tutor",
+    "search_agent": "Search Agent",
+    "account_agent": "Account Manager"
+}
+
+def agent_display_name(agent_name):
+    return AGENT_DISPLAY_NAMES.get(agent_name, agent_name.replace("_", " ").title())
+
+# Show replies as they are generated; set CHAT_STREAMING=false for models
+# that can't stream
+STREAMING = os.getenv("CHAT_STREAMING", "true").lower() in ("1", "true", "yes")
+
+# Only the newest messages are kept in session state and rendered on each
+# rerun; older ones are paged in from the DB on request
+CHAT_WINDOW_MESSAGES = max(2, int(os.getenv("CHAT_WINDOW_MESSAGES", "40")))
+HISTORY_PAGE_SIZE = CHAT_WINDOW_MESSAGES // 2  # interactions, i.e. question/answer pairs
+
+def trim_chat_window():
+    """Drop the oldest messages past the window, whole exchanges at a time."""
+    messages = st.session_state.messages
+    drop = len(messages) - CHAT_WINDOW_MESSAGES
+    if drop <= 0:
+        return
+    # Start the window at a question so no answer is shown without it
+    while drop < len(messages) and messages[drop]["role"] != "user":
+        drop += 1
+    if drop >= len(messages):
+        return
+    del messages[:drop]
+    st.session_state.history_has_more = True
+    # Loaded pages were anchored at the old window start
+    st.session_state.history_cursors = []
+
+def render_message(msg):
+    role = msg["role"]
+    sender_name = msg.get("sender_name")
+
+    # Determine display name and avatar
+    if role == "user":
+        display_name = sender_name or st.session_state.username or "Student"
+        avatar = "👤"
+    else:
+        display_name = agent_display_name(sender_name or "AI Tutor")
+        avatar = "🤖"
+
+    with st.chat_message(name=display_name, avatar=avatar):
+        st.write(f"**{display_name}**")
+        st.markdown(msg["content"])
+
+def render_older_history():
+    """Pages of history older than the window, loaded on demand.
+
+    Session state holds only each page's keyset cursor; the rows come from
+    the cached page loader, so a rerun re-reads nothing from the DB unless
+    the user's rows changed.
+    """
+    cursors = st.session_state.history_cursors
+    data_version = db_manager.data_version(st.session_state.user_id, st.session_state.session_id)
+    pages = [
+        load_history_page(
+            st.session_state.user_id, st.session_state.session_id, data_version,
+            before_id, before_time, HISTORY_PAGE_SIZE
+        )
+        for before_id, before_time in cursors
+    ]
+    has_more = pages[-1]["has_more"] if pages else st.session_state.history_has_more
+
+    if has_more and st.button("⬆️ Load older messages", use_container_width=True):
+        if pages:
+            cursors.append((pages[-1]["next_before_id"], None))
+        else:
+            # Anchor at the window's oldest message: its interaction id if it
+            # came from the DB, else when it was sent
+            oldest = st.session_state.messages[0]
+            cursors.append((oldest["id"], None) if oldest.get("id") else (None, oldest["ts"]))
+        st.rerun()
+    if cursors and st.button("Hide older messages", use_container_width=True):
+        cursors.clear()
+        st.rerun()
+
+    for page in reversed(pages):
+        for h in page["messages"]:
+            render_message({"role": "user", "content": h["query"]})
+            render_message({"role": "assistant", "content": h["response"], "sender_name": h["agent"]})
+
+def render_agent_job(job, record_latency=True):
+    """Stream a submitted turn into an assistant message, then store the reply.
+
+    Returns the kinds of learner data the turn's tools changed.
+    """
+    with st.chat_message("AI Tutor", avatar="🤖"):
+        # Rendered as it arrives, under whichever agent is currently answering
+        header = st.empty()
+        header.write("_Thinking..._")
+        stream = ResponseStream(
+            job.stream(),
+            on_author=lambda author: header.write(f"**{agent_display_name(author)}**")
+        )
+        st.write_stream(stream)
+        st.session_state.agent_job = None
+        if record_latency:
+            get_latency_stats().record(stream)
+
+        if stream.text:
+            st.session_state.messages.append({
+                "role": "assistant", 
+                "content": stream.text,
+                "sender_name": stream.author,
+                "ts": datetime.utcnow().isoformat()
+            })
+        if job.status == FAILED:
+            st.error(f"An error occurred: {job.error}")
+        elif not stream.text:
+            header.empty()
+            st.warning("No response received from agent.")
+    return ui_changes.changes_in(job.events)
+
+def set_sidebar_view(view):
+    st.session_state.sidebar_view = view
+
+@st.fragment
+def render_sidebar(dashboard):
+    """Learning paths, or the open path's progress and syllabus.
+
+    A fragment: switching between the two views (button callbacks) reruns
+    only this; switching chats reruns the app.
+    """
+    current_path = dashboard["current_path"]
+    st.title(f"👤 {st.session_state.username}")
+    if st.caption: st.caption(f"ID: {st.session_state.user_id}")
+    if st.button("Logout"):
+        st.session_state.clear()
+        st.rerun()
+        
+    st.divider()
+    
+    # --- VIEW LOGIC ---
+    # Determine effective view mode
+    # If we have a current path, we default to detail view unless explicitly back in list mode
+    # Actually, let's strictly follow the state variable, but sync it on first load if needed
+    
+    show_detail = False
+    if current_path and st.session_state.sidebar_view == 'detail':
+        show_detail = True
+        
+    if show_detail:
+        # === DETAIL VIEW (Active Path) ===
+        # Just change the view, DO NOT reset the session
+        st.button("🔙 Back to Paths", use_container_width=True, on_click=set_sidebar_view, args=("list",))
+
+        st.markdown(f"### 📂 {current_path['title']}")
+        
+        profile = dashboard["profile"]
+        
+        if profile:
+            st.caption(f"**Subject:** {profile['subject'].upper()}")
+            
+            # Progress Bar (module completion, falling back to level for paths without a syllabus)
+            progress = dashboard["progress"]
+            if progress["total"]:
+                st.progress(progress["percent"])
+                st.caption(f"{progress['completed']}/{progress['total']} modules completed")
+            else:
+                level_str = profile['level'].lower()
+                progress_val = 0.1 if 'beginner' in level_str else 0.5 if 'intermediate' in level_str else 0.9
+                st.progress(progress_val)
+            st.caption(f"Level: {profile['level'].title()}")
+            
+            # Detailed Syllabus Rendering (path syllabus, or the legacy profile one)
+            st.divider()
+            st.markdown("**🎓 Course Syllabus**")
+            
+            if dashboard["modules"]:
+                for item in dashboard["modules"]:
+                    icon = "🔵"
+                    if item["status"] == "completed": icon = "🟢"
+                    elif item["status"] == "in_progress": icon = "🟡"
+                    
+                    with st.expander(f"{icon} {item['module']}"):
+                        if item["subtopics"]:
+                            for sub in item["subtopics"]:
+                                st.markdown(f"- {sub}")
+                        else:
+                            st.caption("No details")
+            else:
+                st.info("Syllabus generating...")
+        else:
+            st.info("Initializing progress...")
+
+    else:
+        # === ROOT VIEW (List Paths) ===
+        if st.button("➕ New Chat", use_container_width=True):
+            st.session_state.session_id = str(uuid.uuid4())
+            st.session_state.messages = []
+            st.session_state.agent_notified = False
+            st.session_state.sidebar_view = 'list' # Stay in list view for new chat
+            st.rerun()
+            
+        st.subheader("Learning Paths")
+        
+        paths = dashboard["paths"]
+        if paths:
+            for p in paths:
+                # Identify if this is the active path
+                is_active = p['session_id'] == st.session_state.session_id
+                
+                label = f"{'📂' if is_active else '📁'} {p['title']}"
+                
+                if is_active:
+                    # Just the view: the callback runs before the fragment reruns
+                    st.button(label, key=p['id'], use_container_width=True, type="primary",
+                              on_click=set_sidebar_view, args=("detail",))
+                elif st.button(label, key=p['id'], use_container_width=True, type="secondary"):
+                    # A DIFFERENT session: reload the whole page with its history
+                    st.session_state.session_id = p['session_id']
+                    st.session_state.messages = []
+                    st.session_state.agent_notified = True
+                    st.session_state.sidebar_view = 'detail'
+                    st.rerun()
+        else:
+            st.info("Start chatting to create a path!")
+
+
 def login_page():
     st.title("🎓 AI Tutor Login")
     
@@ -121,7 +400,7 @@ def chat_page():
     except Exception:
         pass # Session might not exist yet, will create if needed or handle below
 
-    # Create session if it doesn't exist (e.g., server restart or new user)
+    # Create session if it doesn't exist (new user, or a session that was never saved)
     if not runner.session_service.get_session_sync(
         app_name="ai_tutor",
         user_id=st.session_state.user_id,
@@ -139,190 +418,65 @@ def chat_page():
             }
         )
          # CRITICAL: If we had to recreate the session, the backend lost context.
-         # We must resend the [System] login notification.
+         # We must seed it again.
          st.session_state.agent_notified = False
+         st.session_state.tutor_context = None
 
-    # 1. Identify Current Path from Session ID
-    paths = db_manager.get_learning_paths(st.session_state.user_id)
-    current_path = next((p for p in paths if p['session_id'] == st.session_state.session_id), None)
+    # Older-history cursors belong to one chat
+    if st.session_state.get("history_session") != st.session_state.session_id:
+        st.session_state.history_session = st.session_state.session_id
+        st.session_state.history_cursors = []
+        st.session_state.history_has_more = False
+
+    # 1. Everything this page reads from the DB, in one transaction and cached
+    # until the user's data changes: paths, the current session's path with its
+    # syllabus, the profile and (when the chat is empty, i.e. reloading/switching)
+    # the latest history
+    dashboard = load_dashboard(
+        st.session_state.user_id, st.session_state.session_id,
+        db_manager.data_version(st.session_state.user_id, st.session_state.session_id),
+        0 if st.session_state.messages else HISTORY_PAGE_SIZE
+    )
+    current_path = dashboard["current_path"]
 
     # 2. Load history from DB if message are empty (reloading/switching)
     is_new_session = False
     if not st.session_state.messages:
-        # Pass session_id to get relevant history!
-        history = db_manager.get_chat_history(st.session_state.user_id, session_id=st.session_state.session_id, limit=30)
+        history = dashboard["history"]["messages"]
         if history:
             for h in history:
-                st.session_state.messages.append({"role": "user", "content": h["query"]})
-                st.session_state.messages.append({"role": "assistant", "content": h["response"]})
+                st.session_state.messages.append({"role": "user", "content": h["query"], "id": h["id"], "ts": h["timestamp"]})
+                st.session_state.messages.append({"role": "assistant", "content": h["response"], "id": h["id"], "ts": h["timestamp"]})
+            st.session_state.history_has_more = dashboard["history"]["has_more"]
         else:
             is_new_session = True
 
-    # 3. Sidebar: Navigation (Learning Paths)
-    # 3. Sidebar: Navigation (Learning Paths)
-    with st.sidebar:
-        st.title(f"👤 {st.session_state.username}")
-        if st.caption: st.caption(f"ID: {st.session_state.user_id}")
-        if st.button("Logout"):
-            st.session_state.clear()
-            st.rerun()
-            
-        st.divider()
-        
-        # --- VIEW LOGIC ---
-        # Determine effective view mode
-        # If we have a current path, we default to detail view unless explicitly back in list mode
-        # Actually, let's strictly follow the state variable, but sync it on first load if needed
-        
-        show_detail = False
-        if current_path and st.session_state.sidebar_view == 'detail':
-            show_detail = True
-            
-        if show_detail:
-            # === DETAIL VIEW (Active Path) ===
-            if st.button("🔙 Back to Paths", use_container_width=True):
-                # Just change the view, DO NOT reset the session
-                st.session_state.sidebar_view = 'list'
-                st.rerun()
-
-            st.markdown(f"### 📂 {current_path['title']}")
-            
-            # Fetch Progress
-            profile = db_manager.get_student_profile(st.session_state.user_id, subject=current_path['subject'])
-            
-            if profile:
-                st.caption(f"**Subject:** {profile['subject'].upper()}")
-                
-                # Progress Bar
-                level_str = profile['level'].lower()
-                progress_val = 0.1 if 'beginner' in level_str else 0.5 if 'intermediate' in level_str else 0.9
-                st.progress(progress_val)
-                st.caption(f"Level: {profile['level'].title()}")
-                
-                # Detailed Syllabus Rendering
-                st.divider()
-                st.markdown("**🎓 Course Syllabus**")
-                
-                # PREFER Path-specific syllabus, fallback to Profile (legacy)
-                path_syllabus_raw = current_path.get('syllabus')
-                if path_syllabus_raw and path_syllabus_raw != '{}':
-                     details_raw = path_syllabus_raw
-                else:
-                     details_raw = profile.get('details', '{}')
-                try:
-                    import json
-                    # Helper for recursive parsing
-                    def try_parse_json(c, d=3):
-                        if d==0: return c
-                        if isinstance(c, str):
-                            try: return try_parse_json(json.loads(c), d-1)
-                            except: return c
-                        return c
-                    
-                    data = try_parse_json(details_raw)
-                    syllabus_list = None
-                    
-                    if isinstance(data, dict) and "syllabus" in data:
-                        syllabus_list = data["syllabus"]
-                    elif isinstance(data, list):
-                        syllabus_list = data
-                        
-                    if syllabus_list:
-                         for item in syllabus_list:
-                            if isinstance(item, dict):
-                                module_name = item.get("module", "Module")
-                                status = item.get("status", "pending").lower()
-                                subtopics = item.get("subtopics", [])
-                                
-                                icon = "🔵"
-                                if status == "completed": icon = "🟢"
-                                elif status == "in_progress": icon = "🟡"
-                                
-                                with st.expander(f"{icon} {module_name}"):
-                                    if subtopics:
-                                        for sub in subtopics:
-                                            st.markdown(f"- {sub}")
-                                    else:
-                                        st.caption("No details")
-                            else:
-                                st.write(f"• {item}")
-                    else:
-                        st.info("Syllabus generating...")
-                        
-                except Exception as e:
-                    st.caption("Parsing progress details...")
-            else:
-                st.info("Initializing progress...")
-
-        else:
-            # === ROOT VIEW (List Paths) ===
-            if st.button("➕ New Chat", use_container_width=True):
-                st.session_state.session_id = str(uuid.uuid4())
-                st.session_state.messages = []
-                st.session_state.agent_notified = False
-                st.session_state.sidebar_view = 'list' # Stay in list view for new chat
-                st.rerun()
-                
-            st.subheader("Learning Paths")
-            
-            if paths:
-                for p in paths:
-                    # Identify if this is the active path
-                    is_active = p['session_id'] == st.session_state.session_id
-                    
-                    label = f"{'📂' if is_active else '📁'} {p['title']}"
-                    
-                    if st.button(label, key=p['id'], use_container_width=True, type="primary" if is_active else "secondary"):
-                        # Only reload if it's a DIFFERENT session
-                        if not is_active:
-                            st.session_state.session_id = p['session_id']
-                            st.session_state.messages = [] # Reload history
-                            st.session_state.agent_notified = True
-                        
-                        # Always switch to Detail view
-                        st.session_state.sidebar_view = 'detail'
-                        st.rerun()
-            else:
-                st.info("Start chatting to create a path!")
-
-    # 4. Auto-Login Notification (System Message)
-    if not st.session_state.get("agent_notified", False):
+    # 3. Session context for the agents (user, path, level, topic), written
+    # straight into session state: no model turn. Refreshed whenever it changes.
+    context = tutor_context.context_state(
+        st.session_state.user_id, st.session_state.username, st.session_state.session_id, dashboard
+    )
+    notified = st.session_state.get("agent_notified", False)
+    if not notified or st.session_state.get("tutor_context") != context["tutor_context"]:
+        # New chats get a templated greeting instead of one the model writes
+        greeting_text = tutor_context.greeting(st.session_state.username, dashboard) if is_new_session and not notified else None
         try:
-             # Determine system message based on session type
-            if is_new_session and not current_path:
-                 sys_msg = (
-                    f"[System] New user/guest '{st.session_state.username}' (ID: {st.session_state.user_id}) has joined in a blank session. "
-                    "Greet them enthusiastically and ASK what they want to learn today (DSA, Dev, System Design?). "
-                    "If they pick a topic, use `create_learning_path_tool`."
-                )
-            elif is_new_session and current_path:
-                 sys_msg = f"[System] User resumed Learning Path '{current_path['title']}'. Welcome them back and check context."
-            else:
-                 # Just reconnected
-                sys_msg = f"[System] User '{st.session_state.username}' connected."
-            
-            # Inject student profile summary if available? 
-            # (Maybe not necessary if resuming path, agent has history. But good for new chat context inheritance if we implemented that logic. 
-            # The tool will handle inheritance, so here we just notify.)
-            
-            # We run this silently to set context
-            for event in runner.run(
-                user_id=st.session_state.user_id,
-                session_id=st.session_state.session_id,
-                new_message=types.Content(role="user", parts=[types.Part(text=sys_msg)])
-            ):
-                # If it's a new session, we show the greeting
-                if is_new_session and event.content and event.content.parts:
-                    for part in event.content.parts:
-                        if part.text:
-                            st.session_state.messages.append({"role": "assistant", "content": part.text})
-                
+            get_agent_executor().call(tutor_context.inject_context(
+                runner.session_service, "ai_tutor", st.session_state.user_id, st.session_state.session_id,
+                context, greeting_text, author=runner.agent.name
+            ))
+            if greeting_text:
+                st.session_state.messages.append({
+                    "role": "assistant", "content": greeting_text, "ts": datetime.utcnow().isoformat()
+                })
             st.session_state.agent_notified = True
+            st.session_state.tutor_context = context["tutor_context"]
         except Exception as e:
-            st.error(f"Failed to notify agent of login: {e}")
+            st.error(f"Failed to load session context: {e}")
 
-    # 5. Main Chat Area
-    st.title("AI Tutor Assistant" if not current_path else current_path['title'])
+    # 4. Main Chat Area
+    title = st.empty()
+    title.title("AI Tutor Assistant" if not current_path else current_path['title'])
     
     # Welcome Message / Capabilities (Only for blank new chats)
     if not st.session_state.messages and not current_path:
@@ -338,36 +492,21 @@ def chat_page():
         *Ask me anything to get started!*
         """)
 
-    # Display messages
+    # Display messages: older pages only if asked for, then the window
+    trim_chat_window()
+    render_older_history()
     for msg in st.session_state.messages:
-        role = msg["role"]
-        content = msg["content"]
-        sender_name = msg.get("sender_name")
-        
-        # Determine display name and avatar
-        if role == "user":
-            display_name = sender_name or st.session_state.username or "Student"
-            avatar = "👤"
-        else:
-            # Map internal agent names to friendly titles
-            agent_mapping = {
-                "root_agent": "AI Tutor",
-                "dsa_tutor": "DSA Tutor",
-                "dsa_solver": "DSA Solver",
-                "code_generator": "Code Generator",
-                "code_reviewer": "Code Reviewer",
-                "developer_tutor": "Developer Tutor",
-                "system_design_tutor": "System Design Tutor",
-                "search_agent": "Search Agent",
-                "account_agent": "Account Manager"
-            }
-            raw_name = sender_name or "AI Tutor"
-            display_name = agent_mapping.get(raw_name, raw_name.replace("_", " ").title())
-            avatar = "🤖"
+        render_message(msg)
 
-        with st.chat_message(name=display_name, avatar=avatar):
-            st.write(f"**{display_name}**")
-            st.markdown(content)
+    # A turn still running when the last run was interrupted (e.g. a sidebar click);
+    # one for a chat we've since switched away from is in its history already
+    changes = set()
+    pending_job = st.session_state.get("agent_job")
+    if pending_job is not None:
+        if pending_job.session_id == st.session_state.session_id:
+            changes = render_agent_job(pending_job, record_latency=False)
+        else:
+            st.session_state.agent_job = None
 
     if prompt := st.chat_input("Ask me anything about DSA, System Design, or Coding..."):
         # Add user message
@@ -375,64 +514,42 @@ def chat_page():
         st.session_state.messages.append({
             "role": "user", 
             "content": prompt, 
-            "sender_name": user_name
+            "sender_name": user_name,
+            "ts": datetime.utcnow().isoformat()
         })
         with st.chat_message(user_name, avatar="👤"):
             st.write(f"**{user_name}**")
             st.markdown(prompt)
         
         # Generate response
-        with st.chat_message("AI Tutor", avatar="🤖"):
-             with st.spinner("Thinking..."):
-                try:
-                    # Run agent via Runner
-                    response_text = ""
-                    last_author = "root_agent" 
-                    
-                    for event in runner.run(
-                        user_id=st.session_state.user_id,
-                        session_id=st.session_state.session_id,
-                        new_message=types.Content(role="user", parts=[types.Part(text=prompt)])
-                    ):
-                        if event.content and event.content.parts:
-                            if event.author:
-                                last_author = event.author
-                            for part in event.content.parts:
-                                if part.text:
-                                    response_text += part.text
-                    
-                    if response_text:
-                        agent_mapping = {
-                            "root_agent": "AI Tutor",
-                            "dsa_tutor": "DSA Tutor",
-                            "dsa_solver": "DSA Solver",
-                            "code_generator": "Code Generator",
-                            "code_reviewer": "Code Reviewer",
-                            "developer_tutor": "Developer Tutor",
-                            "system_design_tutor": "System Design Tutor",
-                            "search_agent": "Search Agent",
-                            "account_agent": "Account Manager"
-                        }
-                        final_display_name = agent_mapping.get(last_author, last_author.replace("_", " ").title())
-                        
-                        st.write(f"**{final_display_name}**")
-                        st.markdown(response_text)
-                        
-                        st.session_state.messages.append({
-                            "role": "assistant", 
-                            "content": response_text,
-                            "sender_name": last_author
-                        })
-                        
-                        # Rerun to update Sidebar if path was created
-                        st.rerun()
-                    else:
-                        st.warning("No response received from agent.")
-                    
-                except Exception as e:
-                    st.error(f"An error occurred: {e}")
+        try:
+            job = get_agent_executor().submit(
+                user_id=st.session_state.user_id,
+                session_id=st.session_state.session_id,
+                new_message=types.Content(role="user", parts=[types.Part(text=prompt)]),
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE if STREAMING else StreamingMode.NONE)
+            )
+        except queue.Full:
+            st.warning("The tutor is busy with other learners right now. Please try again in a moment.")
+        else:
+            st.session_state.agent_job = job
+            changes = render_agent_job(job)
+
+    # 5. Sidebar, drawn last so a reply's changes show without rerunning the
+    # page; reloaded only if a tool reported changing paths or progress
+    if changes:
+        dashboard = load_dashboard(
+            st.session_state.user_id, st.session_state.session_id,
+            db_manager.data_version(st.session_state.user_id, st.session_state.session_id), 0
+        )
+        if dashboard["current_path"]:
+            title.title(dashboard["current_path"]["title"])
+    with st.sidebar:
+        render_sidebar(dashboard)
 
 if __name__ == "__main__":
+    get_guest_reaper()
+    get_interaction_archiver()
     if not st.session_state.authenticated:
         login_page()
     else:
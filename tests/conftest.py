@@ -0,0 +1,13 @@
+"""Shared fixtures."""
+import pytest
+
+from ai_tutor_agent.utils.db_manager import DBManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A DBManager on a fresh SQLite file, writing interactions synchronously."""
+    monkeypatch.setenv("DB_WRITE_BEHIND", "false")
+    DBManager.configure(f"sqlite:///{tmp_path / 'tutor.db'}")
+    yield DBManager()
+    DBManager.configure(None)
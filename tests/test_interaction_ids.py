@@ -0,0 +1,67 @@
+"""Interaction ids stay unique across the hot table and the archive."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, text
+
+from ai_tutor_agent.utils.migrations import run_migrations
+from ai_tutor_agent.utils.models import ArchivedInteraction, Interaction
+
+
+def test_delete_newest_then_insert_does_not_reuse_archived_ids(manager):
+    manager.create_user("alice", "Alice")
+    manager.create_user("guest_abc123", "Guest")
+    for i in range(3):
+        manager.log_interaction("s1", "alice", "tutor", f"q{i}", f"r{i}")
+    manager.log_interaction("g1", "guest_abc123", "tutor", "hi", "hello")
+
+    # Archive everything, then delete the owner of the newest row
+    assert manager.archive_interactions(datetime.utcnow() + timedelta(seconds=1))["archived"] == 4
+    manager.delete_users(["guest_abc123"])
+
+    manager.log_interaction("s1", "alice", "tutor", "new", "answer")
+    session = manager.get_session("alice")
+    try:
+        new_id = session.query(func.max(Interaction.id)).scalar()
+        archived_ids = {r.id for r in session.query(ArchivedInteraction.id)}
+    finally:
+        session.close()
+    assert new_id > max(archived_ids)
+
+    page = manager.get_chat_history_page("alice", "s1", limit=10)
+    assert [m["query"] for m in page["messages"]] == ["q0", "q1", "q2", "new"]
+
+    # The next run archives the new row instead of failing on a duplicate id
+    assert manager.archive_interactions(datetime.utcnow() + timedelta(seconds=1))["archived"] == 1
+
+
+def test_migration_rebuilds_interactions_with_autoincrement(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    run_migrations(engine)
+    with engine.begin() as conn:
+        # The table as it was before migration 13
+        conn.execute(text("DROP TABLE interactions"))
+        conn.execute(text(
+            "CREATE TABLE interactions (id INTEGER NOT NULL PRIMARY KEY, session_id VARCHAR(100) NOT NULL, "
+            "user_id VARCHAR(100) NOT NULL, agent_name VARCHAR(100), query TEXT, response TEXT, timestamp DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_interactions_user_id ON interactions (user_id)"))
+        conn.execute(text("INSERT INTO interactions (id, session_id, user_id, query) VALUES (3, 's', 'u', 'q')"))
+        conn.execute(text("INSERT INTO interactions_archive (id, session_id, user_id) VALUES (7, 's', 'u')"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 13"))
+
+    assert 13 in run_migrations(engine)["applied"]
+    with engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'interactions'")).scalar()
+        assert "AUTOINCREMENT" in ddl
+        assert conn.execute(text("SELECT query FROM interactions WHERE id = 3")).scalar() == "q"
+        conn.execute(text("INSERT INTO interactions (session_id, user_id) VALUES ('s', 'u')"))
+        assert conn.execute(text("SELECT MAX(id) FROM interactions")).scalar() == 8
+    engine.dispose()
+
+
+def test_archiving_changes_data_version(manager):
+    manager.create_user("alice", "Alice")
+    manager.log_interaction("s1", "alice", "tutor", "q", "r")
+    before = manager.data_version("alice", "s1")
+    manager.archive_interactions(datetime.utcnow() + timedelta(seconds=1))
+    assert manager.data_version("alice", "s1") != before
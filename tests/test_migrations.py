@@ -0,0 +1,55 @@
+"""Migration steps are atomic and stop startup when they fail."""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from ai_tutor_agent.utils import migrations
+from ai_tutor_agent.utils.migrations import Migration, run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tutor.db'}")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+def _tables(engine):
+    with engine.connect() as conn:
+        return set(inspect(conn).get_table_names())
+
+
+def _version(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar()
+
+
+def test_failed_step_rolls_back_its_ddl(engine, monkeypatch):
+    def rename_then_fail(conn):
+        conn.execute(text("ALTER TABLE interactions RENAME TO interactions_old"))
+        raise RuntimeError("boom")
+
+    latest = _version(engine)
+    monkeypatch.setattr(migrations, "MIGRATIONS",
+                        migrations.MIGRATIONS + [Migration(latest + 1, "broken", rename_then_fail)])
+    with pytest.raises(RuntimeError):
+        run_migrations(engine)
+
+    tables = _tables(engine)
+    assert "interactions" in tables and "interactions_old" not in tables
+    assert _version(engine) == latest
+
+
+def test_rebuild_recovers_a_half_migrated_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO interactions (session_id, user_id, query) VALUES ('s', 'u', 'q')"))
+        # What a rebuild that failed after its rename used to leave behind
+        conn.execute(text("ALTER TABLE interactions RENAME TO interactions_old"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 13"))
+
+    assert 13 in run_migrations(engine)["applied"]
+    assert "interactions_old" not in _tables(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT query FROM interactions")).scalars().all() == ["q"]
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'interactions'")).scalar()
+    assert "AUTOINCREMENT" in ddl
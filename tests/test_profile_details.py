@@ -0,0 +1,27 @@
+"""Profile details are free-form JSON and are stored as given."""
+import json
+
+from ai_tutor_agent.utils import db_queries
+from ai_tutor_agent.utils.models import StudentProfile
+
+
+def test_list_details_are_not_wrapped(manager):
+    manager.update_student_profile("alice", "dsa", "Beginner", '["arrays","heaps"]')
+    assert json.loads(manager.get_student_profile("alice", "dsa")["details"]) == ["arrays", "heaps"]
+
+
+def test_double_encoded_details_are_unwrapped(manager):
+    manager.update_student_profile("alice", "dsa", "Beginner", json.dumps(json.dumps({"notes": "x"})))
+    assert json.loads(manager.get_student_profile("alice", "dsa")["details"]) == {"notes": "x"}
+
+
+def test_repair_keeps_profile_lists(manager):
+    session = manager.get_session("alice")
+    try:
+        session.add(StudentProfile(user_id="alice", subject="dsa", level="Beginner",
+                                   details=json.dumps(json.dumps(["arrays"]))))
+        session.commit()
+        assert db_queries.repair_syllabus_encoding(session) == 1
+        assert json.loads(session.query(StudentProfile).one().details) == ["arrays"]
+    finally:
+        session.close()
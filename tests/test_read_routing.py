@@ -0,0 +1,47 @@
+"""Cached reads see this process's own writes, even with a lagging replica."""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+
+from ai_tutor_agent.utils.async_db_manager import AsyncDBManager
+from ai_tutor_agent.utils.migrations import run_migrations
+
+
+@pytest.fixture(autouse=True)
+def lagging_replica(tmp_path, monkeypatch):
+    # A replica that never catches up: a separate, empty database
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    run_migrations(engine)
+    engine.dispose()
+    monkeypatch.setenv("DATABASE_READ_URI", f"sqlite:///{tmp_path / 'replica.db'}")
+
+
+def test_reads_go_to_the_replica(manager):
+    assert manager.read_is_replica
+
+
+def test_profile_read_after_write(manager):
+    assert manager.get_student_profile("alice", "dsa") is None
+    manager.update_student_profile("alice", "dsa", "Beginner", "{}")
+    assert manager.get_student_profile("alice", "dsa")["level"] == "Beginner"
+
+
+def test_learning_paths_read_after_write(manager):
+    manager.create_learning_path("alice", "s1", "dsa", "DSA")
+    assert [p["title"] for p in manager.get_learning_paths("alice")] == ["DSA"]
+
+
+def test_async_reads_after_write(manager):
+    async_manager = AsyncDBManager()
+
+    async def run():
+        await async_manager.update_student_profile("alice", "dsa", "Beginner", "{}")
+        await async_manager.create_learning_path("alice", "s1", "dsa", "DSA")
+        profile = await async_manager.get_student_profile("alice", "dsa")
+        paths = await async_manager.get_learning_paths("alice")
+        return profile, paths
+
+    profile, paths = asyncio.run(run())
+    assert profile["level"] == "Beginner"
+    assert [p["title"] for p in paths] == ["DSA"]
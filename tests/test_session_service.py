@@ -0,0 +1,57 @@
+"""TieredSessionService keeps database I/O off the event loop."""
+import asyncio
+import time
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from ai_tutor_agent.utils.session_service import TieredSessionService
+
+
+def _reply(text):
+    return Event(author="tutor", invocation_id="i", content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def test_evicted_sessions_come_back(manager):
+    service = TieredSessionService(manager, max_sessions=1)
+
+    async def run():
+        first = await service.create_session(app_name="app", user_id="u", session_id="s1", state={"k": 1})
+        await service.append_event(first, _reply("hello"))
+        await service.create_session(app_name="app", user_id="u", session_id="s2")
+        loaded = await service.get_session(app_name="app", user_id="u", session_id="s1")
+        return loaded
+
+    loaded = asyncio.run(run())
+    assert loaded.state["k"] == 1
+    assert [e.content.parts[0].text for e in loaded.events] == ["hello"]
+    assert service.get_stats()["rehydrated"] == 1
+
+
+def test_snapshot_writes_do_not_block_the_loop(manager, monkeypatch):
+    service = TieredSessionService(manager)
+    save = manager.save_session_snapshot
+
+    def slow_save(*args):
+        time.sleep(0.3)
+        return save(*args)
+
+    monkeypatch.setattr(manager, "save_session_snapshot", slow_save)
+
+    async def run():
+        session = await service.create_session(app_name="app", user_id="u", session_id="s1")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await service.append_event(session, _reply("done"))
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
+    assert service.get_stats()["unsaved_sessions"] == 0
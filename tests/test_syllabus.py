@@ -0,0 +1,27 @@
+"""Tools hand the agent its stored syllabus without dropping anything."""
+import json
+
+from ai_tutor_agent.utils.syllabus import syllabus_context
+
+
+def test_unknown_keys_are_kept():
+    raw = json.dumps({
+        "syllabus": [{"module": "Heaps", "status": "completed", "subtopics": [], "notes": "fast learner"}],
+        "current_topic": "Heaps",
+        "pace": "weekly",
+    })
+    context = syllabus_context(raw)
+    assert context["syllabus"][0]["notes"] == "fast learner"
+    assert context["pace"] == "weekly"
+    assert context["progress"]["completed"] == 1
+
+
+def test_current_topic_without_modules():
+    context = syllabus_context(json.dumps({"syllabus": [], "current_topic": "Arrays"}))
+    assert context["current_topic"] == "Arrays"
+    assert context["progress"]["total"] == 0
+
+
+def test_nothing_stored():
+    assert syllabus_context(None) is None
+    assert syllabus_context("{}") is None
@@ -0,0 +1,35 @@
+"""Change marks from several tools in one turn all reach the app."""
+from types import SimpleNamespace
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+
+from ai_tutor_agent.utils import ui_changes
+
+
+def _tool_context(state=None):
+    return SimpleNamespace(state={} if state is None else state, invocation_id="inv-1")
+
+
+def test_marks_from_two_tools_are_kept():
+    context = _tool_context()
+    ui_changes.mark_changed(context, ui_changes.PROGRESS)
+    ui_changes.mark_changed(context, ui_changes.PATHS)
+    event = Event(author="tutor", actions=EventActions(state_delta=context.state))
+    assert ui_changes.changes_in([event]) == {ui_changes.PATHS, ui_changes.PROGRESS}
+
+
+def test_forwarded_sub_agent_delta_does_not_drop_earlier_marks():
+    parent = _tool_context()
+    ui_changes.mark_changed(parent, ui_changes.PATHS)
+    child = _tool_context()
+    ui_changes.mark_changed(child, ui_changes.PROGRESS)
+    # What AgentTool does with each sub-agent event's delta
+    parent.state.update(child.state)
+    event = Event(author="tutor", actions=EventActions(state_delta=parent.state))
+    assert ui_changes.changes_in([event]) == {ui_changes.PATHS, ui_changes.PROGRESS}
+
+
+def test_events_without_marks():
+    events = [Event(author="tutor"), Event(author="tutor", actions=EventActions(state_delta={"x": 1}))]
+    assert ui_changes.changes_in(events) == set()
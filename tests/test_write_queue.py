@@ -0,0 +1,67 @@
+"""Every row the write queue accepts is written, or counted as failed."""
+import threading
+
+from ai_tutor_agent.utils import write_queue
+from ai_tutor_agent.utils.write_queue import InteractionWriteQueue
+
+
+class _Session:
+    def __init__(self, written):
+        self.written = written
+        self.rows = []
+
+    def commit(self):
+        self.written.extend(self.rows)
+
+    def rollback(self):
+        self.rows = []
+
+    def close(self):
+        pass
+
+
+def _log_interaction(session, session_id, user_id, agent_name, query, response, timestamp):
+    if query == "bad":
+        raise ValueError("bad row")
+    session.rows.append(query)
+
+
+def test_put_racing_close_loses_nothing(monkeypatch):
+    monkeypatch.setattr(write_queue.db_queries, "log_interaction", _log_interaction)
+    written = []
+    queue = InteractionWriteQueue(lambda user_id: _Session(written), batch_size=5, flush_interval=0.01)
+    accepted = []
+    start = threading.Barrier(5)
+
+    def producer(n):
+        start.wait()
+        for i in range(200):
+            if queue.put("s", "u", "tutor", f"{n}-{i}", "r"):
+                accepted.append(f"{n}-{i}")
+
+    threads = [threading.Thread(target=producer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    start.wait()
+    queue.close()
+    for t in threads:
+        t.join()
+
+    assert sorted(written) == sorted(accepted)
+    assert queue.pending() == 0
+    assert queue.flush(timeout=1)
+
+
+def test_bad_row_does_not_drop_its_batch(monkeypatch):
+    monkeypatch.setattr(write_queue.db_queries, "log_interaction", _log_interaction)
+    written = []
+    queue = InteractionWriteQueue(lambda user_id: _Session(written), batch_size=10, flush_interval=5)
+    for query in ["a", "bad", "b"]:
+        queue.put("s", "u", "tutor", query, "r")
+    assert queue.flush(timeout=5)
+
+    assert written == ["a", "b"]
+    stats = queue.get_stats()
+    assert stats["flushed_rows"] == 2 and stats["failed_rows"] == 1
+    assert queue.pending() == 0
+    queue.close()